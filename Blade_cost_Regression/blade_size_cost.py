@@ -1,6 +1,12 @@
+import os
+import sys
 import numpy as np
 import pandas as pd
 
+if not __package__:     # run or imported from its own folder, the repository root holds result_records
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from result_records import COST_TABLE_COLUMNS, ResultTable
+
 # Parameters
 radius = np.arange(40, 70, 1)   # corresponding swept blade diameter 80–145 m
 num_blades = 3
@@ -11,26 +17,29 @@ blades_total_produced = production_volume_turbines * num_blades
 C_glass = 1500.0    # £/m³ 
 C_carbon = 12000.0  # £/m³ 
 
+# Branch selection for a single length (plain Python, cheap) or element-wise for arrays
+def _where(cond, a, b):
+    if isinstance(cond, np.ndarray):
+        return np.where(cond, a, b)
+    return a if cond else b
+
+def _clip(x, lo, hi):
+    if isinstance(x, np.ndarray):
+        return np.minimum(np.maximum(x, lo), hi)
+    return min(max(x, lo), hi)
+
 # Initial model
 def blade_volume(L):
     return 12.0 * (L / 50.0)**2.4
 
 # Initial carbon fraction
 def base_carbon_fraction(L):
-    if L <= 25:
-        return 0.10
-    elif L >= 70:
-        return 0.40
-    else:
-        return 0.10 + (L - 25) * (0.30 / (70 - 25))
+    return _where(L <= 25, 0.10, _where(L >= 70, 0.40, 0.10 + (L - 25) * (0.30 / (70 - 25))))
 
 # Structural adjustment for larger blades
 def structural_strengthening(L):
-    extra_carbon = 0.0
-    volume_mult = 1.0
-    if L > 60:
-        extra_carbon += 0.005 * (L - 60) / 10.0  
-        volume_mult += 0.0015 * (L - 60)
+    extra_carbon = _where(L > 60, 0.005 * (L - 60) / 10.0, 0.0)
+    volume_mult = _where(L > 60, 1.0 + 0.0015 * (L - 60), 1.0)
     return volume_mult, extra_carbon
 
 # Tooling cost model
@@ -45,8 +54,7 @@ def tooling_cost_components(L,
                             qa_rig_base=15_000.0):
     mould_factor = 1.0 + mould_size_growth_factor * (L - 50.0)**2
     mould_cost = base_mould_cost * mould_factor
-    if L >= two_piece_threshold:
-        mould_cost *= two_piece_multiplier
+    mould_cost = _where(L >= two_piece_threshold, mould_cost * two_piece_multiplier, mould_cost)
 
     handling_cost_per_blade = handling_base_per_blade + handling_growth_per_m * (L - 50.0)
     additional_fixed = dedicated_jig_base + qa_rig_base
@@ -64,42 +72,62 @@ def amortized_tooling_per_blade(L, production_volume_blades=blades_total_produce
 def support_multiplier(L, base=1.0, growth=0.004):
     return base + growth * L
 
-# Cost model function
-def deterministic_blade_cost(L, production_blades=blades_total_produced):
-    V_base = blade_volume(L)
+# Cost terms of one blade, element-wise for a single length or an array of lengths,
+# keyed by the ResultTable fields of COST_TABLE_COLUMNS (plus the whole-rotor turbine_cost).
+def _blade_cost_terms(L, production_blades, c_glass, c_carbon, num_blades, chord_scale):
+    V_base = blade_volume(L) * chord_scale
     volume_mult, extra_c = structural_strengthening(L)
     V = V_base * volume_mult
 
     f_carbon_base = base_carbon_fraction(L)
-    f_carbon = min(max(f_carbon_base + extra_c, 0.0), 1.0)
+    f_carbon = _clip(f_carbon_base + extra_c, 0.0, 1.0)
 
-    C_mat = f_carbon * C_carbon + (1 - f_carbon) * C_glass
+    C_mat = f_carbon * c_carbon + (1 - f_carbon) * c_glass
 
     sup_mult = support_multiplier(L)
 
     material_structural_cost = V * C_mat * sup_mult
     tooling_amort_per_blade = amortized_tooling_per_blade(L, production_volume_blades=production_blades)
-    total_cost = material_structural_cost + tooling_amort_per_blade
+    blade_cost = material_structural_cost + tooling_amort_per_blade
 
     return {
-        "Diameter_m": 2 * L,
-        "BladeLength_m": L,
-        "Volume_m3": V,
-        "CarbonFraction": f_carbon,
-        "MaterialCostPer_m3_£": C_mat,
-        "MaterialStructuralCost_£": material_structural_cost,
-        "ToolingAmortPerBlade_£": tooling_amort_per_blade,
-        "TotalCost_£": total_cost
+        "D": 2 * L,
+        "L": L,
+        "volume": V,
+        "carbon_fraction": f_carbon,
+        "material_cost_per_m3": C_mat,
+        "material_structural_cost": material_structural_cost,
+        "tooling_per_blade": tooling_amort_per_blade,
+        "blade_cost": blade_cost,
+        "turbine_cost": num_blades * blade_cost,
     }
 
+# Cost model for an array of blade lengths, written into the columns of a ResultTable.
+# The helpers above work element-wise on arrays as well as on single lengths.
+def blade_cost_arrays(L, production_blades=None, c_glass=C_glass, c_carbon=C_carbon, table=None,
+                      num_blades=num_blades, chord_scale=1.0):
+    # chord_scale: blade chord relative to the reference planform, the laminate volume scales with it.
+    # production_blades defaults to the blades of the whole production run, num_blades per turbine
+    if production_blades is None:
+        production_blades = production_volume_turbines * num_blades
+    L = np.asarray(L, dtype=float)
+    if table is None:
+        table = ResultTable(L.size)
+    for field, values in _blade_cost_terms(L, production_blades, c_glass, c_carbon, num_blades, chord_scale).items():
+        table[field] = values
+    return table
+
+# Cost of a single blade, as a dict with the blade_costs.csv column names.
+# Computed directly on the scalar (no ResultTable), for callers that price one design at a time.
+def deterministic_blade_cost(L, production_blades=blades_total_produced, c_glass=C_glass, c_carbon=C_carbon,
+                             chord_scale=1.0):
+    terms = _blade_cost_terms(float(L), production_blades, c_glass, c_carbon, num_blades, chord_scale)
+    return {name: float(terms[field]) for field, name in COST_TABLE_COLUMNS.items()}
+
 # Table 
 def compute_table(radius):
-    data = []
-    for D in radius:
-        L = D / 2.0
-        data.append(deterministic_blade_cost(L))
-    df = pd.DataFrame(data)
-    return df
+    table = blade_cost_arrays(np.asarray(radius, dtype=float) / 2.0)
+    return table.to_dataframe(list(COST_TABLE_COLUMNS), names=COST_TABLE_COLUMNS, flags=False)
 
 # Main 
 if __name__ == "__main__":
@@ -2,12 +2,14 @@
 
 import numpy as np
 
-from ODE_group.ODE_code import WIND_VELOCITIES, solve_tip_for_DV
-from Blade_cost_Regression.blade_size_cost import deterministic_blade_cost
-from Power.power_and_cp_root_finding import (
-    compute_lambda_optimal,
-    expected_power_MW,
+from ODE_group.ODE_code import WIND_VELOCITIES, DeflectionDiagnostics, solve_tip_for_DV
+from Blade_cost_Regression.blade_size_cost import (
+    blade_cost_arrays,
+    deterministic_blade_cost,
+    num_blades,
+    production_volume_turbines,
 )
+from Power.power_and_cp_root_finding import compute_lambda_optimal, expected_power_MW_array
 
 
 # PARAMETERS
@@ -17,60 +19,70 @@ LAMBDA_OPT = compute_lambda_optimal()
 
 
 # STRUCTURAL CHECK
-def worstcase_tip_deflection(D: float) -> float:
-    V = max(WIND_VELOCITIES.values())   # 22.6 m/s (strong gale)
+def worstcase_tip_deflection(D: float, V_max: float = None) -> float:
+    V = max(WIND_VELOCITIES.values()) if V_max is None else V_max   # 22.6 m/s (strong gale)
     R = D / 2.0
     omega = LAMBDA_OPT * V / R          # rotational speed based on λ_opt
     return solve_tip_for_DV(D, V, omega)
 
-def is_structurally_feasible(D: float) -> bool:
-    y_tip = worstcase_tip_deflection(D)
+def is_structurally_feasible(D: float, delta_max_frac=DELTA_MAX_FRAC, D_cap=D_CAP, V_max=None) -> bool:
+    y_tip = worstcase_tip_deflection(D, V_max)
     L = D / 2.0
-    return (y_tip <= DELTA_MAX_FRAC * L) and (D <= D_CAP)
+    return (y_tip <= delta_max_frac * L) and (D <= D_cap)
 
-def get_safe_diameters(D_min=40, D_max=D_CAP, step=0.5):
+def get_safe_diameters(D_min=40, D_max=D_CAP, step=0.5, delta_max_frac=DELTA_MAX_FRAC, V_max=None, diagnostics=None):
+    # The deflection checks of the sweep go to one DeflectionDiagnostics collector instead of a
+    # warning per diameter (the unsafe diameters are large deflections by definition).
+    # Pass your own collector to read its summary() afterwards.
     grid = np.arange(D_min, D_max + 1e-9, step)
-    safe = [D for D in grid if is_structurally_feasible(D)]
+    with diagnostics if diagnostics is not None else DeflectionDiagnostics(severity="collect"):
+        safe = [D for D in grid if is_structurally_feasible(D, delta_max_frac, D_max, V_max)]
     return np.array(safe)
 
 
 # COST MODEL
-def blade_cost_gbp(D):
+def blade_cost_gbp(D, num_blades=num_blades, **cost_kwargs):
+    # cost_kwargs are passed on to deterministic_blade_cost (production_blades, c_glass, c_carbon, chord_scale).
+    # The tooling is amortised over the blades of the whole production run, i.e. num_blades per turbine
+    cost_kwargs.setdefault("production_blades", production_volume_turbines * num_blades)
     L = D / 2.0
-    per_blade = deterministic_blade_cost(L)["TotalCost_£"]
-    return 3.0 * per_blade  # 3 blades per turbine
+    per_blade = deterministic_blade_cost(L, **cost_kwargs)["TotalCost_£"]
+    return num_blades * per_blade
 
 
 # OPTIMISATION
-def optimise_over_safe_diameters(V_power=6.0):
-    safe_D = get_safe_diameters()
+def optimise_over_safe_diameters(V_power=6.0, D_min=40, D_cap=D_CAP, step=0.5,
+                                 delta_max_frac=DELTA_MAX_FRAC, V_max=None, diagnostics=None, **cost_kwargs):
+    safe_D = get_safe_diameters(D_min, D_cap, step, delta_max_frac, V_max, diagnostics)
     if safe_D.size == 0:
         raise RuntimeError("No structurally safe diameters!")
 
-    results = []
-    for D in safe_D:
-        power = float(expected_power_MW(D, V_power))  
-        cost  = float(blade_cost_gbp(D))              
-        score = power / cost                          
-        results.append((D, score, power, cost))
+    table = blade_cost_arrays(safe_D / 2.0, **cost_kwargs)
+    table["V"] = V_power
+    table["power"] = expected_power_MW_array(safe_D, V_power)
+    table["score"] = table["power"] / table["turbine_cost"]
+    table["safe"] = True
 
-    D_opt, best_score, best_power, best_cost = max(results, key=lambda t: t[1])
+    best = int(np.argmax(table["score"]))
 
     return {
-        "D_opt_m": D_opt,
-        "objective_MW_per_GBP": best_score,
-        "expected_power_MW": best_power,
-        "cost_GBP": best_cost,
+        "D_opt_m": float(table["D"][best]),
+        "objective_MW_per_GBP": float(table["score"][best]),
+        "expected_power_MW": float(table["power"][best]),
+        "cost_GBP": float(table["turbine_cost"][best]),
         "safe_diameters": safe_D,
+        "table": table,
     }
 
 
 # MAIN EXECUTION
 if __name__ == "__main__":
-    out = optimise_over_safe_diameters(V_power=6.0)
+    diagnostics = DeflectionDiagnostics(severity="collect")
+    out = optimise_over_safe_diameters(V_power=6.0, diagnostics=diagnostics)
     print(
         f"Optimal D (within safety) = {out['D_opt_m']:.1f} m\n"
         f"Power  = {out['expected_power_MW']:.2f} MW\n"
         f"Cost   = £{out['cost_GBP']:,.0f}\n"
         f"Score  = {out['objective_MW_per_GBP']:.3e} MW/£"
     )
+    print(diagnostics.summary())
@@ -1,8 +1,15 @@
+import os
+import sys
 import numpy as np
 import warnings
 from math import hypot
 from scipy.integrate import solve_bvp
 
+if not __package__:     # run or imported from its own folder, the repository root holds shared modules
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from result_records import ResultTable
+from site_conditions import STANDARD_AIR_DENSITY
+
 
 #  Wind speeds for WhiteLee Wind Farm, to be changed as needed
 WIND_VELOCITIES: dict = {
@@ -15,11 +22,22 @@ WIND_VELOCITIES: dict = {
     "strong_gale": 22.6     # strong gale wind speed in m/s, 0.006% of the time
 }
 
+# Fraction of the year each of the wind speeds above occurs (from the percentages above)
+WIND_FREQUENCIES: dict = {
+    "light": 0.4466,
+    "gentle": 0.1899,
+    "moderate": 0.167,
+    "fresh": 0.095,
+    "strong": 0.0134,
+    "near_gale": 0.0015,
+    "strong_gale": 0.00006
+}
+
 
 #define other input variables
 BLADE_YOUNGS_MODULUS: int = 45e9  # Young's modulus for glass fibre reinforced polymer with carbon fibre 
 BLADE_DRAG_COEF: float = 0.4  # Drag coefficient for an inefficient aerofoil perpendicular to flow NEED TO ADDRESS IN REPORT
-AIR_DENSITY: float = 1.225  # Density of air in kg/m^3
+AIR_DENSITY: float = STANDARD_AIR_DENSITY  # Density of air in kg/m^3, see site_conditions.py
 TIP_SPEED_RATIO: int = 6.0 # estimate based off of Siemens website IMPORTANT TO PUT IN REPORT
 BLADE_MASS_PER_LENGTH: int = 410 # kg/m, estimate based off of Siemens website IMPORTANT TO PUT IN REPORT
 GRAVITY: float = 9.81
@@ -33,11 +51,11 @@ I_BEND_ACROSS_WIDTH  = (BLADE_HEIGHT * BLADE_WIDTH ** 3) / 12   # load acts over
 
 
     
-def drag_load(blade_lengths: list, wind_speed: float) -> list:
+def drag_load(blade_lengths: list, wind_speed: float, air_density: float = AIR_DENSITY) -> list:
     """
     Load due to wind drag acting transversely onto the blade
     """
-    return [0.5 * BLADE_DRAG_COEF * AIR_DENSITY * BLADE_HEIGHT * (wind_speed ** 2)] * len(blade_lengths)
+    return [0.5 * BLADE_DRAG_COEF * air_density * BLADE_HEIGHT * (wind_speed ** 2)] * len(blade_lengths)
 
 
 def grav_load(blade_lengths: list) -> list:
@@ -47,7 +65,7 @@ def grav_load(blade_lengths: list) -> list:
     return [BLADE_MASS_PER_LENGTH * GRAVITY] * len(blade_lengths)
 
 
-def rot_load(blade_lengths: list, wind_speed: float) -> list:
+def rot_load(blade_lengths: list, wind_speed: float, air_density: float = AIR_DENSITY) -> list:
     """
     Load due to rotation of the blade causing drag, parallel to the gravitational force
     """
@@ -55,7 +73,7 @@ def rot_load(blade_lengths: list, wind_speed: float) -> list:
     rot_load_list = [0.0] * len(blade_lengths)
     for i, length in enumerate(blade_lengths):
         rot_speed = TIP_SPEED_RATIO * wind_speed / length
-        ar = 0.5 * (rot_speed ** 2) * AIR_DENSITY * BLADE_DRAG_COEF * BLADE_WIDTH 
+        ar = 0.5 * (rot_speed ** 2) * air_density * BLADE_DRAG_COEF * BLADE_WIDTH 
         rot_load_list[i] = ar
         
     return rot_load_list
@@ -63,7 +81,7 @@ def rot_load(blade_lengths: list, wind_speed: float) -> list:
 
 #TODO WIDTH AND HEIGHT ARE ARBITRARY GUESSES FOR NOW
 
-def analytic_tip_deflections(L: float, a_r: float, b_const: float, rl_const: float):
+def analytic_tip_deflections(L: float, a_r: float, b_const: float, rl_const: float, E: float = BLADE_YOUNGS_MODULUS):
     """
     Analytical solutions for the differential equations:
 
@@ -73,8 +91,8 @@ def analytic_tip_deflections(L: float, a_r: float, b_const: float, rl_const: flo
     x-direction (wind drag, uniform):
     y_x(L) = rl_const * L^4 / (8 E I_x)
     """
-    EI_y = BLADE_YOUNGS_MODULUS * I_BEND_ACROSS_HEIGHT
-    EI_x = BLADE_YOUNGS_MODULUS * I_BEND_ACROSS_WIDTH
+    EI_y = E * I_BEND_ACROSS_HEIGHT
+    EI_x = E * I_BEND_ACROSS_WIDTH
 
     y_y = ((13.0 / 180.0) * a_r * L ** 6 / EI_y) + (b_const * L ** 4 / (8.0 * EI_y))
     y_x = rl_const * L ** 4 / (8.0 * EI_x)
@@ -82,6 +100,132 @@ def analytic_tip_deflections(L: float, a_r: float, b_const: float, rl_const: flo
     return y_y, y_x
 
 
+class DeflectionDiagnostics:
+    """
+    Collects the BVP-vs-analytic checks of a whole sweep into one report instead of
+    emitting warnings on every solve. Use it as a context manager around the sweep:
+
+        with DeflectionDiagnostics(severity="warn", sample_rate=0.1) as diag:
+            ... solve_tip_deflection_for_length(...) calls ...
+        print(diag.summary())
+
+    severity:
+      "audit"   - every call is checked and warns individually (the default behaviour
+                  without a collector), and is also counted in the report
+      "warn"    - checks are counted, one summary RuntimeWarning at the end if any failed
+      "collect" - checks are only counted
+      "raise"   - the first BVP/analytic mismatch raises a RuntimeError
+                  (large deflections are only counted)
+    sample_rate is the fraction of calls whose result is compared with the analytic
+    solution (every n-th call), ignored in "audit" mode. Input validation is always done.
+    Collectors of worker processes are combined with merge(worker_diag.report()).
+    """
+
+    SEVERITIES = ("audit", "warn", "collect", "raise")
+
+    def __init__(self, severity="collect", sample_rate=1.0):
+        if severity not in self.SEVERITIES:
+            raise ValueError(f"severity must be one of {self.SEVERITIES}, got {severity!r}")
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError(f"sample_rate must be in [0, 1], got {sample_rate!r}")
+        self.severity = severity
+        self.stride = 1 if severity == "audit" else (0 if sample_rate == 0 else max(1, round(1 / sample_rate)))
+        self.calls = 0
+        self.checked = 0
+        self.mismatch_y = 0
+        self.mismatch_x = 0
+        self.large_deflection = 0
+        self.max_rel_error = 0.0
+        self.worst_L = None
+        self.max_deflection_ratio = 0.0
+        self.worst_deflection_L = None
+        self._previous = None
+
+    def __enter__(self):
+        global _active_diagnostics
+        self._previous = _active_diagnostics
+        _active_diagnostics = self
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        global _active_diagnostics
+        _active_diagnostics = self._previous
+        if exc_type is None and self.severity == "warn" and self.failures:
+            warnings.warn(self.summary(), RuntimeWarning)
+        return False
+
+    def sample(self) -> bool:
+        """Count a call and decide whether it is checked against the analytic solution."""
+        self.calls += 1
+        return self.stride > 0 and (self.calls - 1) % self.stride == 0
+
+    def record(self, L, y1_num, y2_num, y1_ana, y2_ana, rtol, atol):
+        self.checked += 1
+        for direction, num, ana in (("y", y1_num, y1_ana), ("x", y2_num, y2_ana)):
+            diff = abs(num - ana)
+            rel = diff / (abs(ana) + atol)
+            if rel > self.max_rel_error:
+                self.max_rel_error, self.worst_L = rel, L
+            if diff > atol + rtol * abs(ana):
+                if direction == "y":
+                    self.mismatch_y += 1
+                else:
+                    self.mismatch_x += 1
+                if self.severity == "raise":
+                    raise RuntimeError(
+                        f"{direction}-direction BVP tip deflection deviates from analytic solution by "
+                        f"{diff:.3e} m (relative {rel:.3e}) at L={L}."
+                    )
+
+        ratio = hypot(y1_num, y2_num) / L
+        if ratio > self.max_deflection_ratio:
+            self.max_deflection_ratio, self.worst_deflection_L = ratio, L
+        if ratio > 0.1:
+            self.large_deflection += 1
+
+    @property
+    def failures(self) -> int:
+        return self.mismatch_y + self.mismatch_x + self.large_deflection
+
+    def report(self) -> dict:
+        return {
+            "calls": self.calls,
+            "checked": self.checked,
+            "mismatch_y": self.mismatch_y,
+            "mismatch_x": self.mismatch_x,
+            "large_deflection": self.large_deflection,
+            "max_rel_error": self.max_rel_error,
+            "worst_L": self.worst_L,
+            "max_deflection_ratio": self.max_deflection_ratio,
+            "worst_deflection_L": self.worst_deflection_L,
+        }
+
+    def merge(self, report: dict) -> None:
+        """Add the counts of another collector's report(), e.g. one returned by a worker process."""
+        self.calls += report["calls"]
+        self.checked += report["checked"]
+        self.mismatch_y += report["mismatch_y"]
+        self.mismatch_x += report["mismatch_x"]
+        self.large_deflection += report["large_deflection"]
+        if report["max_rel_error"] > self.max_rel_error:
+            self.max_rel_error, self.worst_L = report["max_rel_error"], report["worst_L"]
+        if report["max_deflection_ratio"] > self.max_deflection_ratio:
+            self.max_deflection_ratio, self.worst_deflection_L = report["max_deflection_ratio"], report["worst_deflection_L"]
+
+    def summary(self) -> str:
+        worst = f" at L={self.worst_L:.2f} m" if self.worst_L is not None else ""
+        worst_defl = f" at L={self.worst_deflection_L:.2f} m" if self.worst_deflection_L is not None else ""
+        return (
+            f"Deflection checks: {self.checked}/{self.calls} solves checked, "
+            f"{self.mismatch_y + self.mismatch_x} BVP/analytic mismatches "
+            f"(max relative error {self.max_rel_error:.2e}{worst}), "
+            f"{self.large_deflection} large deflections (max |y_tip|/L = {self.max_deflection_ratio:.2f}{worst_defl})."
+        )
+
+
+_active_diagnostics = None
+
+
 def _sanity_check_tip_deflection(
     L: float,
     a_r: float,
@@ -91,6 +235,7 @@ def _sanity_check_tip_deflection(
     y2_num: float,
     rtol: float = 1e-3,
     atol: float = 1e-6,
+    E: float = BLADE_YOUNGS_MODULUS,
 ) -> None:
     
     """
@@ -107,8 +252,13 @@ def _sanity_check_tip_deflection(
         if not np.isfinite(val):
             raise ValueError(f"Non-finite value for {name}: {val!r}")
 
+    # With a DeflectionDiagnostics collector active only a sample of the calls is compared
+    diag = _active_diagnostics
+    if diag is not None and not diag.sample():
+        return
+
     # Tip deflections for comparison
-    y1_ana, y2_ana = analytic_tip_deflections(L, a_r, b_const, rl_const)
+    y1_ana, y2_ana = analytic_tip_deflections(L, a_r, b_const, rl_const, E)
 
     if not np.all(np.isfinite([y1_num, y2_num, y1_ana, y2_ana])):
         raise FloatingPointError(
@@ -116,6 +266,11 @@ def _sanity_check_tip_deflection(
             "analytic comparison."
         )
 
+    if diag is not None:
+        diag.record(L, y1_num, y2_num, y1_ana, y2_ana, rtol, atol)
+        if diag.severity != "audit":
+            return
+
     # Compare numerical BVP against analytic solution
     if not np.isclose(y1_num, y1_ana, rtol=rtol, atol=atol):
         diff = abs(y1_num - y1_ana)
@@ -148,67 +303,73 @@ def _sanity_check_tip_deflection(
             )
 
 
-def solve_tip_deflection_for_length(L: float, a_r: float, b_const: float, rl_const: float) -> float:
+def _solve_cantilever_tip(L: float, rhs_func, EI: float) -> float:
     """
-    Solve two BVPs on [0, L] with cantilever BCs:
-      y(0)=y'(0)=0, y''(L)=y'''(L)=0
-    1) EI*y'''' = a_r x^2 + b_const
-    2) EI*y'''' = rl_const
-    Return hypot(y1(L), y2(L)).
+    Tip deflection y(L) of a cantilever with EI*y'''' = rhs_func(x),
+    y(0)=y'(0)=0, y''(L)=y'''(L)=0, solved with solve_bvp.
     """
-    def make_solver(rhs_func, EI):
-        # y1=y, y2=y', y3=y'', y4=y'''
-
-        def ordinary_differntial_equation(x, Y):
-            d1 = Y[1]                                                       # y1' = y2
-            d2 = Y[2]                                                       # y2' = y3
-            d3 = Y[3]                                                       # y3' = y4
-            d4 = rhs_func(x) / (EI)                                         # y4' = y'''' = w(x)/EI
-            return np.vstack((d1, d2, d3, d4))
-
-        def boundary_conditions(Ya, Yb):
-            """
-            Ya = Y at x=0  = [y(0), y'(0)]
-            Yb = Y at x=L  = [y''(L), y'''(L)]
-            """
-            return np.array([Ya[0], Ya[1], Yb[2], Yb[3]])
-
-        # Using a reasonable guess for the starting point, solve for BVP
-        x = np.linspace(0.0, L, 10)
+    # y1=y, y2=y', y3=y'', y4=y'''
+
+    def ordinary_differntial_equation(x, Y):
+        d1 = Y[1]                                                       # y1' = y2
+        d2 = Y[2]                                                       # y2' = y3
+        d3 = Y[3]                                                       # y3' = y4
+        d4 = rhs_func(x) / (EI)                                         # y4' = y'''' = w(x)/EI
+        return np.vstack((d1, d2, d3, d4))
+
+    def boundary_conditions(Ya, Yb):
+        """
+        Ya = Y at x=0  = [y(0), y'(0)]
+        Yb = Y at x=L  = [y''(L), y'''(L)]
+        """
+        return np.array([Ya[0], Ya[1], Yb[2], Yb[3]])
+
+    # Using a reasonable guess for the starting point, solve for BVP
+    x = np.linspace(0.0, L, 10)
+    Y0 = np.zeros((4, x.size))
+    sol = solve_bvp(ordinary_differntial_equation, boundary_conditions, x, Y0, max_nodes=10000)
+
+    if sol.status != 0:             # Checking in case solver did not converge
+        x = np.linspace(0.0, L, 50)
         Y0 = np.zeros((4, x.size))
         sol = solve_bvp(ordinary_differntial_equation, boundary_conditions, x, Y0, max_nodes=10000)
 
-        if sol.status != 0:             # Checking in case solver did not converge
-            x = np.linspace(0.0, L, 50)
-            Y0 = np.zeros((4, x.size))
-            sol = solve_bvp(ordinary_differntial_equation, boundary_conditions, x, Y0, max_nodes=10000)
-        
-        if sol.status != 0:
-            raise RuntimeError(
-                f"BVP solver failed to converge for L={L}, EI={EI}. "
-                f"Status: {sol.status}, message: {sol.message}"
-            )
+    if sol.status != 0:
+        raise RuntimeError(
+            f"BVP solver failed to converge for L={L}, EI={EI}. "
+            f"Status: {sol.status}, message: {sol.message}"
+        )
 
-        if not np.all(np.isfinite(sol.y)):
-            raise FloatingPointError(
-                "Non-finite values in BVP solution array (NaN or inf)."
-            )
+    if not np.all(np.isfinite(sol.y)):
+        raise FloatingPointError(
+            "Non-finite values in BVP solution array (NaN or inf)."
+        )
 
-        return sol.sol(np.array([L]))[0,0]
-    
+    return sol.sol(np.array([L]))[0,0]
+
+
+def solve_tip_deflection_for_length(L: float, a_r: float, b_const: float, rl_const: float,
+                                    E: float = BLADE_YOUNGS_MODULUS) -> float:
+    """
+    Solve two BVPs on [0, L] with cantilever BCs:
+      y(0)=y'(0)=0, y''(L)=y'''(L)=0
+    1) EI*y'''' = a_r x^2 + b_const
+    2) EI*y'''' = rl_const
+    Return hypot(y1(L), y2(L)).
+    """
     # Load distribution for ODE in y-direction due to rotational drag and weight
     rhs1 = lambda x: a_r * (x ** 2) + b_const
     # Load distribution for ODE in x-direction due to wind
     rhs2 = lambda x, r=rl_const: np.full_like(x, r, dtype=float)
 
-    EI_y = BLADE_YOUNGS_MODULUS * I_BEND_ACROSS_HEIGHT
-    EI_x = BLADE_YOUNGS_MODULUS * I_BEND_ACROSS_WIDTH
+    EI_y = E * I_BEND_ACROSS_HEIGHT
+    EI_x = E * I_BEND_ACROSS_WIDTH
 
     # Apply solver to functions
-    y1L = make_solver(rhs1, EI_y)
-    y2L = make_solver(rhs2, EI_x)
+    y1L = _solve_cantilever_tip(L, rhs1, EI_y)
+    y2L = _solve_cantilever_tip(L, rhs2, EI_x)
 
-    _sanity_check_tip_deflection(L, a_r, b_const, rl_const, y1L, y2L)
+    _sanity_check_tip_deflection(L, a_r, b_const, rl_const, y1L, y2L, E=E)
 
     return hypot(y1L, y2L)
 
@@ -218,58 +379,104 @@ def solve_tip_deflection_for_length(L: float, a_r: float, b_const: float, rl_con
 # and rotor speed omega (rad/s), compute the blade tip
 # deflection using the same load model as this module.
 
-def solve_tip_for_DV(D: float, V: float, omega: float) -> float:
-
-    # Blade length
-    L = D / 2.0
-    
+def loads_for_DV(V, omega, rho=AIR_DENSITY):
+    """
+    Load constants (a_r, b_const, rl_const) for site wind speed V, rotor speed omega
+    and air density rho. Works elementwise on NumPy arrays as well as on floats.
+    """
     # Rotational "drag-like" load per unit length [N/m]
     # Match the structure of rot_load, but use the given omega directly
-    a_r = 0.5 * AIR_DENSITY * BLADE_DRAG_COEF * BLADE_WIDTH * (omega ** 2)
+    a_r = 0.5 * rho * BLADE_DRAG_COEF * BLADE_WIDTH * (omega ** 2)
 
     # Gravity load per unit length [N/m] (same as grav_load)
     b_const = BLADE_MASS_PER_LENGTH * GRAVITY
 
     # Transverse wind drag load per unit length [N/m] (same as drag_load)
-    rl_const = 0.5 * BLADE_DRAG_COEF * AIR_DENSITY * BLADE_HEIGHT * (V ** 2)
+    rl_const = 0.5 * BLADE_DRAG_COEF * rho * BLADE_HEIGHT * (V ** 2)
+
+    return a_r, b_const, rl_const
+
+def solve_tip_for_DV(D: float, V: float, omega: float, E: float = BLADE_YOUNGS_MODULUS,
+                     rho: float = AIR_DENSITY) -> float:
+
+    # Blade length
+    L = D / 2.0
+
+    a_r, b_const, rl_const = loads_for_DV(V, omega, rho)
 
     # Use the main BVP solver
-    return float(solve_tip_deflection_for_length(L, a_r, b_const, rl_const))
+    return float(solve_tip_deflection_for_length(L, a_r, b_const, rl_const, E))
+
+def deflection_influence_coefficients(L: float, E: float = BLADE_YOUNGS_MODULUS):
+    """
+    The beam equation is linear in the load, so the tip deflections for any
+    (a_r, b_const, rl_const) are
+        y_y = a_r * c_ar + b_const * c_b,    y_x = rl_const * c_rl
+    with the coefficients below, each from one BVP solve with a unit load.
+    """
+    EI_y = E * I_BEND_ACROSS_HEIGHT
+    EI_x = E * I_BEND_ACROSS_WIDTH
+    c_ar = _solve_cantilever_tip(L, lambda x: x ** 2, EI_y)
+    c_b = _solve_cantilever_tip(L, lambda x: np.ones_like(x), EI_y)
+    c_rl = _solve_cantilever_tip(L, lambda x: np.ones_like(x), EI_x)
+    return c_ar, c_b, c_rl
+
+def solve_tip_for_DV_batch(D: float, V, omega, E: float = BLADE_YOUNGS_MODULUS, rho=AIR_DENSITY):
+    """
+    Tip deflection of one blade (diameter D) for arrays of wind speeds, rotor speeds and
+    air densities (broadcast), e.g. a year of site conditions. Three BVP solves in total,
+    the load cases are combined through the influence coefficients.
+    """
+    c_ar, c_b, c_rl = deflection_influence_coefficients(D / 2.0, E)
+    a_r, b_const, rl_const = loads_for_DV(np.asarray(V, dtype=float), np.asarray(omega, dtype=float),
+                                          np.asarray(rho, dtype=float))
+    return np.hypot(a_r * c_ar + b_const * c_b, rl_const * c_rl)
 
 # ------------------------------------------------------------------------------
 
 def results():
     # Paste wind buns and run ODE
     wind_keys = ["light","gentle","moderate","fresh","strong","near_gale","strong_gale"]
-    deflection_results = []
 
     # Define list for blade lengths to be tested, realistic range based on model chosen
     blade_lengths = np.arange(40.0, 80.0, 0.5)  # Turbine blade diameters from 80m to 160m in 1m increments, while being represented by radii
 
+    # One row per (wind case, blade length), wind cases stored one after the other
+    n = blade_lengths.size
+    table = ResultTable(len(wind_keys) * n)
+
+    # Deviations from the analytic solution are reported once for the whole sweep
+    diagnostics = DeflectionDiagnostics(severity="collect")
+
     # For each wind case compute the corresponding load
-    for key in wind_keys:
+    for k, key in enumerate(wind_keys):
         vel = WIND_VELOCITIES[key]
         drag_list = drag_load(blade_lengths, vel)            # rl (wind) [N/m]
         grav_list = grav_load(blade_lengths)                 # b (gravity) [N/m]
         ar_list   = rot_load(blade_lengths, vel)             # a_r [N/m^3]
 
-        # Solve ODE for each beam length for every blade length and store in deflection_results
-        y_for_this_wind = []
-        for L, a_r, b, rl in zip(blade_lengths, ar_list, grav_list, drag_list):
-            b_const  = float(b)         # gravity only in (a)
-            rl_const = float(rl)        # wind only in (b)
-            y_tip = solve_tip_deflection_for_length(float(L), float(a_r), b_const, rl_const)
-            y_for_this_wind.append(y_tip)
+        # Solve ODE for each beam length for every blade length and store in the table
+        rows = slice(k * n, (k + 1) * n)
+        table["L"][rows] = blade_lengths
+        table["V"][rows] = vel
+        y_for_this_wind = table["deflection"][rows]
+        with diagnostics:
+            for i, (L, a_r, b, rl) in enumerate(zip(blade_lengths, ar_list, grav_list, drag_list)):
+                b_const  = float(b)         # gravity only in (a)
+                rl_const = float(rl)        # wind only in (b)
+                y_for_this_wind[i] = solve_tip_deflection_for_length(float(L), float(a_r), b_const, rl_const)
 
-        deflection_results.append(y_for_this_wind)
+    table["D"] = 2 * table["L"]
 
-    data_by_wind = {k: v for k, v in zip(wind_keys, deflection_results)}
+    # views into the table, one array per wind case
+    data_by_wind = {key: table["deflection"][k * n:(k + 1) * n] for k, key in enumerate(wind_keys)}
 
     print("# Results (BVP): deflection vs. blade length")
-    for i, vals in zip(blade_lengths, zip(*deflection_results)):
+    for i, vals in zip(blade_lengths, zip(*(data_by_wind[key] for key in wind_keys))):
        yL, yG, yM, yF, yS, yNG, ySG = vals
        print(f"Diameter: {2*i:.1f} m, yL: {yL:.3g} m, yG: {yG:.3g} m, yM: {yM:.3g} m, "
              f"yF: {yF:.3g} m, yS: {yS:.3g} m, yNG: {yNG:.3g} m, ySG: {ySG:.3g} m")
+    print(diagnostics.summary())
        
     return data_by_wind, blade_lengths
 
@@ -1,6 +1,11 @@
 import math 
+import os
+import sys
 import numpy as np 
-import matplotlib.pyplot as plt 
+
+if not __package__:     # run or imported from its own folder, the repository root holds site_conditions
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from site_conditions import STANDARD_AIR_DENSITY, STANDARD_VISCOSITY
 
 # ------------------------------------------------------------
 # Convenience wrapper for optimizer:
@@ -11,17 +16,31 @@ def compute_lambda_optimal():
     lambda_guess = 8.5
     ERROR_TOLERANCE = 1e-6
     MAX_ITER = 20
-    return newton(g_lambda, dg_dlambda, lambda_guess, ERROR_TOLERANCE, MAX_ITER)
-
-def expected_power_MW(D, V_site=V_wind):
+    lambda_opt = newton(g_lambda, dg_dlambda, lambda_guess, ERROR_TOLERANCE, MAX_ITER)
+
+    # Newton from a fixed guess can fail or land on a minimum of lambda^2 Cp; then bracket
+    # the maximum on a Cp scan and refine it instead, so this never returns None
+    lo, hi = LAMBDA_SCAN_RANGE
+    if lambda_opt is None or not lo <= lambda_opt <= hi or dg_dlambda(lambda_opt) >= 0:
+        result = optimise_lambda(objective="power")
+        print(f"Newton solve rejected, bracketed maximum at lambda = {float(result['lambda_opt']):.8f} "
+              f"({result['status'].item()})")
+        lambda_opt = float(result["lambda_opt"])
+    return lambda_opt
+
+def expected_power_MW(D, V_site=V_wind, omega_r=None, rho=STANDARD_AIR_DENSITY):
     """
     Expected power (MW) at site wind speed V_site for a turbine of diameter D.
     Uses the BEM Cp model defined for a 20.5 m reference blade.
+    omega_r is the rotor speed in rad/s (defaults to the fixed 10 rpm design speed),
+    rho the air density in kg/m^3.
     """
     R = D / 2.0
+    if omega_r is None:
+        omega_r = Omega_r
 
     # Tip-speed ratio for the *real* turbine at the site wind
-    lam = (Omega_r * R) / V_site
+    lam = (omega_r * R) / V_site
     if lam < 1e-6:
         return 0.0
 
@@ -32,8 +51,32 @@ def expected_power_MW(D, V_site=V_wind):
     Cp = calculate_Cp(lam, Omega_r, V_model)
     Cp = max(0.0, min(0.593, Cp))   # clip to [0, Betz]
 
-    RHO_AIR = 1.225
-    P = 0.5 * RHO_AIR * math.pi * (R**2) * Cp * (V_site**3)
+    P = 0.5 * rho * math.pi * (R**2) * Cp * (V_site**3)
+    return P / 1_000_000.0
+
+def expected_power_MW_array(D, V_site=V_wind, omega_r=None, rho=STANDARD_AIR_DENSITY, viscosity=None,
+                            B_num=3, chord_scale=1.0, twist_scale=1.0):
+    """
+    Same as expected_power_MW but for arrays of diameters, site wind speeds, rotor speeds
+    and/or air densities (broadcast against each other), using one vectorised BEM evaluation.
+    If the air viscosity is given (e.g. from site_conditions) the airfoil drag is corrected
+    for the change in Reynolds number from standard air (see calculate_Cp_array).
+    B_num, chord_scale and twist_scale describe the rotor (see calculate_Cp_array).
+    """
+    R = np.asarray(D, dtype=float) / 2.0
+    V_site = np.asarray(V_site, dtype=float)
+    omega_r = Omega_r if omega_r is None else np.asarray(omega_r, dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lam = (omega_r * R) / V_site
+        valid = lam >= 1e-6
+        V_model = np.where(valid, (Omega_r * Radius) / np.where(valid, lam, 1.0), 0.0)
+
+    Cp = np.clip(calculate_Cp_array(lam, Omega_r, V_model, rho, viscosity,
+                                    B_num, chord_scale, twist_scale), 0.0, 0.593)
+    Cp = np.where(valid, Cp, 0.0)
+
+    P = 0.5 * rho * math.pi * (R**2) * Cp * (V_site**3)
     return P / 1_000_000.0
 
 # ----------------------------------------------------------------
@@ -118,31 +161,38 @@ def get_airfoil_data(alpha_deg):
     Cd = 0.015
     return Cl, Cd
 
-def calculate_Cp(lambda_value, omega_r, v_wind):
-    blade_data = [
-        {"r": 4.5, "twist": 20.0, "chord": 1.63}, {"r": 6.5, "twist": 13.0, "chord": 1.540},
-        {"r": 8.5, "twist": 7.45, "chord": 1.420}, {"r": 10.5, "twist": 4.85, "chord": 1.294},
-        {"r": 12.5, "twist": 3.15, "chord": 1.163}, {"r": 14.5, "twist": 2.02, "chord": 1.026},
-        {"r": 16.5, "twist": 0.77, "chord": 0.881}, {"r": 18.5, "twist": 0.14, "chord": 0.705},
-        {"r": 20.3, "twist": 0.02, "chord": 0.265} 
-    ]
-    R_total = 20.5
-    B_num = 3
-    RHO_AIR = 1.225
-    total_torque = 0.0
+BLADE_DATA = [
+    {"r": 4.5, "twist": 20.0, "chord": 1.63}, {"r": 6.5, "twist": 13.0, "chord": 1.540},
+    {"r": 8.5, "twist": 7.45, "chord": 1.420}, {"r": 10.5, "twist": 4.85, "chord": 1.294},
+    {"r": 12.5, "twist": 3.15, "chord": 1.163}, {"r": 14.5, "twist": 2.02, "chord": 1.026},
+    {"r": 16.5, "twist": 0.77, "chord": 0.881}, {"r": 18.5, "twist": 0.14, "chord": 0.705},
+    {"r": 20.3, "twist": 0.02, "chord": 0.265} 
+]
 
-    for i in range(len(blade_data) - 1):
-        elem = blade_data[i]
-        r = elem["r"]; chord = elem["chord"]
-        dr = blade_data[i+1]["r"] - r
-        a = 0.0; a_prime = 0.0
+BLADE_R = np.array([elem["r"] for elem in BLADE_DATA])
+BLADE_TWIST = np.array([elem["twist"] for elem in BLADE_DATA])
+BLADE_CHORD = np.array([elem["chord"] for elem in BLADE_DATA])
+
+""" 
+The BEM solve is split into small kernels (airfoil lookup -> one blade element -> whole rotor) that only use
+scalar maths, so the same source can either run as plain Python or be compiled with numba. The kernels are
+built by the _make_* factories so that the compiled element kernel calls the compiled airfoil lookup.
+The backend is chosen at runtime with set_bem_backend("python" | "numba") or the BEM_BACKEND environment variable.
+"""
+def _make_bem_element(airfoil):
+    def bem_element(r, twist, chord, omega_r, v_wind, B_num, R_total):
+        """
+        Iterates the axial (a) and tangential (a_prime) induction factors for one blade element.
+        Returns a, a_prime and the tangential force coefficient Ct of the last iteration.
+        """
+        a = 0.0; a_prime = 0.0; Ct = 0.0
 
         for _ in range(100):
             if (1 + a_prime) * omega_r * r == 0: continue
             phi_rad = math.atan(((1 - a) * v_wind) / ((1 + a_prime) * omega_r * r))
             if phi_rad < 0: phi_rad += math.pi
-            alpha_deg = math.degrees(phi_rad) - elem["twist"]
-            Cl, Cd = get_airfoil_data(alpha_deg)
+            alpha_deg = math.degrees(phi_rad) - twist
+            Cl, Cd = airfoil(alpha_deg)
             Cn = Cl * math.cos(phi_rad) + Cd * math.sin(phi_rad)
             Ct = Cl * math.sin(phi_rad) - Cd * math.cos(phi_rad)
             sigma = (B_num * chord) / (2 * math.pi * r)
@@ -188,15 +238,251 @@ def calculate_Cp(lambda_value, omega_r, v_wind):
             
             # updating a_prime for each loop that its used 
             a_prime = 0.7 * a_prime + 0.3 * a_prime_new
-        
-        V_rel_sq = ((1-a)*v_wind)**2 + ((1+a_prime)*omega_r*r)**2
-        p_T = 0.5 * RHO_AIR * V_rel_sq * chord * Ct
-        total_torque += B_num * p_T * r * dr
+
+        return a, a_prime, Ct
+    return bem_element
+
+def _make_bem_torque(element):
+    def bem_torque(r_arr, twist_arr, chord_arr, omega_r, v_wind, B_num, R_total, rho):
+        """
+        Total rotor torque summed over the blade elements.
+        """
+        total_torque = 0.0
+        for i in range(len(r_arr) - 1):
+            r = r_arr[i]; chord = chord_arr[i]
+            dr = r_arr[i+1] - r
+            a, a_prime, Ct = element(r, twist_arr[i], chord, omega_r, v_wind, B_num, R_total)
+            V_rel_sq = ((1-a)*v_wind)**2 + ((1+a_prime)*omega_r*r)**2
+            p_T = 0.5 * rho * V_rel_sq * chord * Ct
+            total_torque += B_num * p_T * r * dr
+        return total_torque
+    return bem_torque
+
+_BEM_KERNELS = {"python": _make_bem_torque(_make_bem_element(get_airfoil_data))}
+_bem_backend = "python"
+
+def _compile_numba_kernels():
+    from numba import njit
+    airfoil = njit(cache=True)(get_airfoil_data)
+    element = njit(cache=True)(_make_bem_element(airfoil))
+    return njit(cache=True)(_make_bem_torque(element))
+
+def set_bem_backend(name, check_parity=True):
+    """
+    Select the BEM kernel used by calculate_Cp: "python" (default) or "numba".
+    If numba is not installed the pure Python kernel is kept and a warning is printed.
+    With check_parity the compiled kernel is compared against the Python one before use.
+    """
+    global _bem_backend
+    if name not in ("python", "numba"):
+        raise ValueError(f"Unknown BEM backend {name!r}, expected 'python' or 'numba'")
+
+    if name == "numba" and "numba" not in _BEM_KERNELS:
+        try:
+            _BEM_KERNELS["numba"] = _compile_numba_kernels()
+        except ImportError:
+            print("numba is not installed - using the pure Python BEM kernel")
+            name = "python"
+
+    _bem_backend = name
+    if check_parity and name != "python":
+        max_diff = check_bem_backend_parity(name)
+        if max_diff > 1e-9:
+            _bem_backend = "python"
+            raise RuntimeError(f"BEM backend {name!r} differs from the Python kernel by {max_diff:.2e} in Cp")
+    return _bem_backend
+
+def get_bem_backend():
+    return _bem_backend
+
+def check_bem_backend_parity(name="numba", lambda_values=None):
+    """
+    Largest absolute difference in Cp between the given backend and the pure Python kernel,
+    over a range of tip-speed ratios.
+    """
+    if lambda_values is None:
+        lambda_values = np.linspace(0.5, 20.0, 40)
+    max_diff = 0.0
+    for lam in lambda_values:
+        v = (Omega_r * Radius) / lam
+        Cp_ref = _cp_from_kernel(_BEM_KERNELS["python"], Omega_r, v)
+        Cp_new = _cp_from_kernel(_BEM_KERNELS[name], Omega_r, v)
+        max_diff = max(max_diff, abs(Cp_new - Cp_ref))
+    return max_diff
+
+def calculate_Cp(lambda_value, omega_r, v_wind, B_num=3, chord_scale=1.0, twist_scale=1.0):
+    return _cp_from_kernel(_BEM_KERNELS[_bem_backend], omega_r, v_wind, B_num,
+                           BLADE_CHORD * chord_scale, BLADE_TWIST * twist_scale)
+
+def _cp_from_kernel(kernel, omega_r, v_wind, B_num=3, chord=BLADE_CHORD, twist=BLADE_TWIST):
+    R_total = 20.5
+    total_torque = kernel(
+        BLADE_R, twist, chord, float(omega_r), float(v_wind), int(B_num), R_total, STANDARD_AIR_DENSITY
+    )
     
     Area = math.pi * R_total**2
-    P_avail = 0.5 * RHO_AIR * Area * v_wind**3
+    P_avail = 0.5 * STANDARD_AIR_DENSITY * Area * v_wind**3
     return total_torque * omega_r / P_avail if P_avail > 0 else 0.0
 
+def calculate_Cp_array(lambda_values, omega_r, v_wind, rho=STANDARD_AIR_DENSITY, viscosity=None,
+                       B_num=3, chord_scale=1.0, twist_scale=1.0):
+    """
+    Vectorised version of calculate_Cp: the same BEM iteration, run for a whole array of
+    operating points at once. omega_r, v_wind and rho are broadcast against each other and every
+    point keeps iterating until it converges (points that have converged are frozen), so the
+    result matches calculate_Cp point by point.
+    With viscosity given, the airfoil Cd is scaled with the element Reynolds number,
+    Cd = 0.015 * (Re / Re_std)^-0.2, where Re_std is the Reynolds number of the same element
+    in standard air. The constant Cd = 0.015 is taken to hold in standard air, so
+    Re / Re_std = (rho / rho_std) * (mu_std / mu) and standard inputs give the plain model.
+    B_num (blade count), chord_scale and twist_scale (factors on the reference chord and twist
+    distributions) broadcast like the other inputs, so several rotor configurations can be
+    solved in the same call.
+    """
+    omega_r, v_wind, rho, B_num, chord_scale, twist_scale = np.broadcast_arrays(
+        np.asarray(omega_r, dtype=float), np.asarray(v_wind, dtype=float), np.asarray(rho, dtype=float),
+        np.asarray(B_num, dtype=float), np.asarray(chord_scale, dtype=float), np.asarray(twist_scale, dtype=float),
+    )
+    if viscosity is None:
+        Cd = 0.015
+    else:
+        Cd = 0.015 * ((rho / STANDARD_AIR_DENSITY) * (STANDARD_VISCOSITY / np.asarray(viscosity, dtype=float))) ** -0.2
+    blade_data = BLADE_DATA
+    R_total = 20.5
+    a_c = 0.2
+    total_torque = np.zeros(omega_r.shape)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for i in range(len(blade_data) - 1):
+            elem = blade_data[i]
+            r = elem["r"]; chord = elem["chord"] * chord_scale; twist = elem["twist"] * twist_scale
+            dr = blade_data[i+1]["r"] - r
+            sigma = (B_num * chord) / (2 * math.pi * r)
+            a = np.zeros(omega_r.shape); a_prime = np.zeros(omega_r.shape); Ct = np.zeros(omega_r.shape)
+            active = np.ones(omega_r.shape, dtype=bool)
+
+            for _ in range(100):
+                upd = active & ((1 + a_prime) * omega_r * r != 0)
+                phi_rad = np.arctan(((1 - a) * v_wind) / ((1 + a_prime) * omega_r * r))
+                phi_rad = np.where(phi_rad < 0, phi_rad + math.pi, phi_rad)
+                alpha_deg = np.degrees(phi_rad) - twist
+                Cl = np.where(np.abs(alpha_deg) < 10, 2 * math.pi * np.radians(alpha_deg), 0.0)
+                Cn = Cl * np.cos(phi_rad) + Cd * np.sin(phi_rad)
+                Ct = np.where(upd, Cl * np.sin(phi_rad) - Cd * np.cos(phi_rad), Ct)
+                f = (B_num / 2) * (R_total - r) / (r * np.sin(np.maximum(phi_rad, 0.001)))
+                F = (2 / math.pi) * np.arccos(np.exp(-np.minimum(f, 35)))
+
+                K_denom = sigma * Cn
+                K_denom = np.where(K_denom == 0, 1e-6, K_denom)
+                K = (4 * F * np.sin(phi_rad)**2) / K_denom
+                a_new_unreliable = np.where(K != -1, 1 / (K + 1), 0.5)
+                sqrt_term_content = (K*(1 - 2*a_c) + 2)**2 + 4*(K*a_c**2 - 1)
+                a_glauert = 0.5 * (2 + K*(1 - 2*a_c) - np.sqrt(np.maximum(sqrt_term_content, 0.0)))
+                a_new = np.where((a_new_unreliable <= a_c) | (sqrt_term_content < 0), a_new_unreliable, a_glauert)
+                a = np.where(upd, 0.7 * a + 0.3 * a_new, a)
+
+                Ct_denom = sigma * Ct
+                Ct_denom = np.where(Ct_denom == 0, 1e-6, Ct_denom)
+                denom = (4 * F * np.sin(phi_rad) * np.cos(phi_rad) / Ct_denom) - 1
+                a_prime_new = np.where(denom == 0, 0.0, 1 / denom)
+
+                converged = upd & (np.abs(a - a_new) < 1e-5) & (np.abs(a_prime - a_prime_new) < 1e-5)
+                a_prime = np.where(upd & ~converged, 0.7 * a_prime + 0.3 * a_prime_new, a_prime)
+                active &= ~converged
+                if not active.any():
+                    break
+
+            V_rel_sq = ((1-a)*v_wind)**2 + ((1+a_prime)*omega_r*r)**2
+            p_T = 0.5 * rho * V_rel_sq * chord * Ct
+            total_torque += B_num * p_T * r * dr
+
+        Area = math.pi * R_total**2
+        P_avail = 0.5 * rho * Area * v_wind**3
+        return np.where(P_avail > 0, total_torque * omega_r / P_avail, 0.0)
+
+LAMBDA_SCAN_RANGE = (1.0, 20.0)
+
+def _lambda_objective(lam, objective, omega_r, rho, viscosity, B_num, chord_scale, twist_scale):
+    V_model = (omega_r * Radius) / lam
+    Cp = np.clip(calculate_Cp_array(lam, omega_r, V_model, rho, viscosity, B_num, chord_scale, twist_scale),
+                 0.0, 0.593)
+    return (Cp if objective == "cp" else lam**2 * Cp), Cp
+
+def optimise_lambda(omega_r=None, rho=STANDARD_AIR_DENSITY, viscosity=None, B_num=3, chord_scale=1.0, twist_scale=1.0,
+                    objective="cp", lambda_range=LAMBDA_SCAN_RANGE, n_scan=200, xtol=1e-7, max_iter=100):
+    """
+    Optimal tip-speed ratio for a batch of operating conditions / rotors. omega_r, rho,
+    B_num, chord_scale and twist_scale are broadcast against each other, one case per element.
+    objective "cp" maximises Cp, "power" maximises lambda^2 Cp (power at fixed rotor speed
+    and wind speed as the radius changes, the quantity g_lambda differentiates).
+
+    All cases are scanned on n_scan points in lambda_range with one BEM call, the best scan
+    point gives a bracket of two grid cells, and the brackets are refined together by
+    golden-section search (one BEM call per iteration for every case) to xtol.
+    No derivatives are taken, so the noise of the BEM fixed-point iteration does not matter.
+
+    Returns a dict of arrays with the broadcast case shape:
+    lambda_opt, objective, cp, bracket_width, converged, n_evaluations and status
+    ("ok", "boundary" if the maximum is at the edge of lambda_range, "no_power" if Cp is 0
+    over the whole range).
+    """
+    if objective not in ("cp", "power"):
+        raise ValueError(f"Unknown objective {objective!r}, expected 'cp' or 'power'")
+    omega_r = Omega_r if omega_r is None else omega_r
+    cases = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (omega_r, rho, B_num, chord_scale, twist_scale)))
+    shape = cases[0].shape
+    params = [c.reshape(-1, 1) for c in cases]
+    visc = None if viscosity is None else np.broadcast_to(np.asarray(viscosity, dtype=float), shape).reshape(-1, 1)
+
+    def f(lam):
+        return _lambda_objective(lam, objective, params[0], params[1], visc, *params[2:])
+
+    # coarse scan, all cases in one call
+    grid = np.linspace(lambda_range[0], lambda_range[1], n_scan)
+    scan, scan_cp = f(grid[None, :])
+    rows = np.arange(scan.shape[0])
+    i = np.argmax(scan, axis=1)
+    best_x, best_f, best_cp = grid[i], scan[rows, i], scan_cp[rows, i]
+
+    # golden-section refinement of [grid[i-1], grid[i+1]] in lock step
+    a = grid[np.maximum(i - 1, 0)]
+    b = grid[np.minimum(i + 1, n_scan - 1)]
+    invphi = (math.sqrt(5.0) - 1.0) / 2.0
+    c = b - invphi * (b - a)
+    d = a + invphi * (b - a)
+    (fc, cpc), (fd, cpd) = (v[:, 0] for v in f(c[:, None])), (v[:, 0] for v in f(d[:, None]))
+    n_evals = n_scan + 2
+    for _ in range(max_iter):
+        if np.all(b - a <= xtol):
+            break
+        left = fc >= fd                         # maximum lies in [a, d]
+        a, b = np.where(left, a, c), np.where(left, d, b)
+        x_new = np.where(left, b - invphi * (b - a), a + invphi * (b - a))
+        f_new, cp_new = (v[:, 0] for v in f(x_new[:, None]))
+        n_evals += 1
+        c, fc, cpc, d, fd, cpd = (
+            np.where(left, x_new, d), np.where(left, f_new, fd), np.where(left, cp_new, cpd),
+            np.where(left, c, x_new), np.where(left, fc, f_new), np.where(left, cpc, cp_new),
+        )
+
+    # keep the best point seen; Cp has jumps where blade elements stall
+    for x, fx, cpx in ((c, fc, cpc), (d, fd, cpd)):
+        better = fx > best_f
+        best_x, best_f, best_cp = np.where(better, x, best_x), np.where(better, fx, best_f), np.where(better, cpx, best_cp)
+
+    status = np.full(rows.size, "ok", dtype=object)
+    status[(i == 0) | (i == n_scan - 1)] = "boundary"
+    status[best_f <= 0] = "no_power"
+    return {
+        "lambda_opt": best_x.reshape(shape),
+        "objective": best_f.reshape(shape),
+        "cp": best_cp.reshape(shape),
+        "bracket_width": (b - a).reshape(shape),
+        "converged": (b - a <= xtol).reshape(shape),
+        "n_evaluations": np.full(shape, n_evals),
+        "status": status.reshape(shape),
+    }
+
 """ 
 Instead of using a really complex method for deriving my expressions for the functions G and G' I am using the mathematical formula for the derivative of a function - how much it changes over a step which is usually time 
 This is essentially like changing distance to distance over time and then to acceleration 
@@ -206,6 +492,10 @@ This is essentially like changing distance to distance over time and then to acc
 step_size = 1e-5 # Middle ground testing step sizes for functions 
 Radius = 20.5
 Omega_r = 10.0 * (2 * math.pi /60) #I am using 10 rpm here as that is within the optimal range for an industrial wind turbine in lower wind speeds. 
+
+# optional compiled BEM kernel, e.g. BEM_BACKEND=numba python Final_optimal_diameter.py
+if os.environ.get("BEM_BACKEND", "python") != "python":
+    set_bem_backend(os.environ["BEM_BACKEND"])
     
 def g_lambda(lambda_value):
     """ 
@@ -258,7 +548,9 @@ This is the final section - collating the inputs from all of the previous code t
 
 """
 if __name__ == "__main__":
-    
+    # matplotlib is only needed for the plots below, importing it here keeps the module usable headless
+    import matplotlib.pyplot as plt
+
     # Design constants 
     # these calculations will use the annual average wind speed of our land based wind farm, but the BEM (blade element momentim model) theory needs to use dynamic wind values 
     V_wind = 6.0
@@ -308,7 +600,7 @@ if __name__ == "__main__":
     #radius range is from 10m to 65m
     radius_range = np.linspace(10, 65, 50) # 50 points from 10m to 65m
     power_values = []
-    RHO_AIR = 1.225 #air density at sea level 
+    RHO_AIR = STANDARD_AIR_DENSITY #air density at sea level 
             
     print("Calculating Power-Radius plot ")
     for R in radius_range:
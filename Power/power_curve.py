@@ -0,0 +1,203 @@
+# === Variable-Speed Power Curve Tables ===
+"""
+Builds power curves for a range of rotor diameters with a simple variable-speed controller,
+instead of the fixed 10 rpm rotor used by expected_power_MW:
+
+    V < cut-in                     : 0
+    region 2  (optimal lambda)     : Omega = lambda_opt * V / R, Cp = Cp_max
+    region 2.5 (tip-speed limited) : Omega = Omega_max, Cp = Cp(Omega_max * R / V)
+    region 3  (rated)              : P = P_rated (pitch control assumed to hold rated power)
+    V >= cut-out                   : 0 (turbine parked)
+
+The BEM Cp only depends on the tip-speed ratio, so one Cp(lambda) curve from the vectorised
+BEM is enough to solve every diameter and wind speed at once. The results are stored on
+(D, V) grids; on uniform grids a lookup is an O(1) bilinear interpolation (other grids use
+a binary search for the cell), and AEP or time-series
+evaluations can use the table instead of re-running BEM for every wind sample.
+
+Region 2.5 is only used when a tip-speed limit is given. The BEM model has no pitch, so in
+that region Cp follows the unpitched Cp(lambda) curve, which drops to zero quickly below
+lambda_opt.
+
+Usage (from the repository root):
+    python -m Power.power_curve
+"""
+
+import math
+
+import numpy as np
+
+from Power.power_and_cp_root_finding import Omega_r, Radius, calculate_Cp_array, optimise_lambda
+from site_conditions import STANDARD_AIR_DENSITY
+
+
+# PARAMETERS
+RHO_AIR = STANDARD_AIR_DENSITY
+CUT_IN = 3.0                    # m/s
+CUT_OUT = 25.0                  # m/s
+MAX_TIP_SPEED = None            # m/s, optional noise/erosion limit on the blade tip (e.g. 80)
+REFERENCE_RATING = (93.0, 2.3)  # (diameter m, rated MW) of the Gamesa G93 2.3 MW
+LAMBDA_GRID = np.linspace(0.5, 20.0, 2000)
+
+REGION_PARKED, REGION_OPTIMAL, REGION_TIP_LIMITED, REGION_RATED = 0, 1, 2, 3
+
+_optimum = None
+
+
+def cp_curve(lambda_grid=LAMBDA_GRID):
+    """
+    Cp(lambda) of the BEM reference rotor on lambda_grid, clipped to [0, Betz].
+    """
+    V_model = (Omega_r * Radius) / lambda_grid
+    return np.clip(calculate_Cp_array(lambda_grid, Omega_r, V_model), 0.0, 0.593)
+
+def optimal_lambda():
+    """
+    Tip-speed ratio and Cp of maximum Cp of the reference rotor, from optimise_lambda
+    (solved once per process).
+    """
+    global _optimum
+    if _optimum is None:
+        result = optimise_lambda(objective="cp")
+        _optimum = float(result["lambda_opt"]), float(result["cp"])
+    return _optimum
+
+
+def _uniform_step(grid):
+    """Spacing of grid if it is uniform (None otherwise, or for a single point)."""
+    if grid.size < 2:
+        return None
+    step = np.diff(grid)
+    return float(step[0]) if np.allclose(step, step[0]) else None
+
+
+def _grid_cell(grid, step, x):
+    """
+    Cell index and fractional position of x (clamped to the grid) for linear interpolation.
+    On a uniform grid (step given) the index is found arithmetically, otherwise by binary search.
+    """
+    if grid.size == 1:
+        return np.zeros(x.shape, dtype=int), np.zeros(x.shape)
+    x = np.clip(x, grid[0], grid[-1])
+    if step is not None:
+        f = (x - grid[0]) / step
+        i = np.minimum(f.astype(int), grid.size - 2)
+        return i, f - i
+    i = np.clip(np.searchsorted(grid, x, side="right") - 1, 0, grid.size - 2)
+    return i, (x - grid[i]) / (grid[i + 1] - grid[i])
+
+
+class PowerCurveTable:
+    """
+    Precomputed power curves on increasing diameter and wind speed grids.
+    Arrays are indexed [diameter, wind speed]. The power and rotor speed tables hold the
+    running (un-parked) values everywhere, so interpolation never blends across cut-in or
+    cut-out; power_MW and rotor_speed apply the cut-in/cut-out limits themselves.
+    """
+
+    def __init__(self, diameters, wind_speeds, power_MW, omega, cp, region, cut_in, cut_out):
+        self.diameters = diameters
+        self.wind_speeds = wind_speeds
+        self.power_MW_table = power_MW
+        self.omega_table = omega
+        self.cp_table = cp
+        self.region_table = region
+        self.cut_in = cut_in
+        self.cut_out = cut_out
+        self._diameter_step = _uniform_step(diameters)
+        self._wind_speed_step = _uniform_step(wind_speeds)
+
+    def _interp(self, table, D, V):
+        i, ti = _grid_cell(self.diameters, self._diameter_step, np.asarray(D, dtype=float))
+        j, tj = _grid_cell(self.wind_speeds, self._wind_speed_step, np.asarray(V, dtype=float))
+        i1 = np.minimum(i + 1, self.diameters.size - 1)
+        j1 = np.minimum(j + 1, self.wind_speeds.size - 1)
+        return ((1 - ti) * ((1 - tj) * table[i, j] + tj * table[i, j1])
+                + ti * ((1 - tj) * table[i1, j] + tj * table[i1, j1]))
+
+    def power_MW(self, D, V):
+        """Power (MW) for diameters D at wind speeds V (broadcast)."""
+        V = np.asarray(V, dtype=float)
+        P = self._interp(self.power_MW_table, D, V)
+        return np.where((V < self.cut_in) | (V >= self.cut_out), 0.0, P)
+
+    def rotor_speed(self, D, V):
+        """Rotor speed (rad/s) set by the controller."""
+        V = np.asarray(V, dtype=float)
+        omega = self._interp(self.omega_table, D, V)
+        return np.where((V < self.cut_in) | (V >= self.cut_out), 0.0, omega)
+
+    def annual_energy_MWh(self, D, wind_speeds, weights):
+        """
+        Annual energy yield from a wind speed distribution, weights are normalised
+        to fractions of the year (e.g. the WIND_VELOCITIES percentages or Weibull bins).
+        """
+        weights = np.asarray(weights, dtype=float)
+        weights = weights / weights.sum()
+        P = self.power_MW(np.asarray(D, dtype=float)[..., None], np.asarray(wind_speeds, dtype=float))
+        return 8760.0 * np.sum(P * weights, axis=-1)
+
+    def energy_from_timeseries_MWh(self, D, V_series, dt_hours):
+        """Energy (MWh) over a wind speed time series sampled every dt_hours."""
+        P = self.power_MW(np.asarray(D, dtype=float)[..., None], np.asarray(V_series, dtype=float))
+        return np.sum(P, axis=-1) * dt_hours
+
+
+def build_power_curves(diameters, wind_speeds=None, rated_power_MW=None, cut_in=CUT_IN, cut_out=CUT_OUT,
+                       max_tip_speed=MAX_TIP_SPEED):
+    """
+    Solve the controller regions for every (D, V) at once.
+    diameters : increasing diameters (m)
+    rated_power_MW : scalar or one value per diameter; by default the G93 2.3 MW rating
+                     scaled with swept area.
+    """
+    diameters = np.asarray(diameters, dtype=float)
+    if wind_speeds is None:
+        wind_speeds = np.arange(0.0, cut_out + 5.0 + 1e-9, 0.05)
+    wind_speeds = np.asarray(wind_speeds, dtype=float)
+    if rated_power_MW is None:
+        D_ref, P_ref = REFERENCE_RATING
+        rated_power_MW = P_ref * (diameters / D_ref)**2
+    P_rated = np.broadcast_to(np.asarray(rated_power_MW, dtype=float), diameters.shape)[:, None]
+
+    cp_values = cp_curve()
+    lam_opt, _ = optimal_lambda()
+
+    R = diameters[:, None] / 2.0
+    V = wind_speeds[None, :]
+    omega_max = np.inf if max_tip_speed is None else max_tip_speed / R
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        omega = np.minimum(lam_opt * V / R, omega_max)
+        lam = np.where(V > 0, omega * R / V, lam_opt)
+    cp = np.interp(lam, LAMBDA_GRID, cp_values)
+    P_aero = 0.5 * RHO_AIR * math.pi * R**2 * cp * V**3 / 1_000_000.0
+    power = np.minimum(P_aero, P_rated)
+
+    region = np.where(lam_opt * V / R < omega_max, REGION_OPTIMAL, REGION_TIP_LIMITED)
+    region = np.where(P_aero >= P_rated, REGION_RATED, region)
+    # in region 3 the rotor speed is held at the value it had when rated power was reached
+    below_rated = (region != REGION_RATED) & (V >= cut_in)
+    omega_rated = np.max(np.where(below_rated, omega, 0.0), axis=1, keepdims=True)
+    omega = np.where(region == REGION_RATED, omega_rated, omega)
+
+    # power and omega stay un-parked so lookups next to cut-in/cut-out are not blended with 0
+    region = np.where((V < cut_in) | (V >= cut_out), REGION_PARKED, region)
+
+    return PowerCurveTable(diameters, wind_speeds, power, omega, cp, region, cut_in, cut_out)
+
+
+# MAIN EXECUTION
+if __name__ == "__main__":
+    from ODE_group.ODE_code import WIND_VELOCITIES, WIND_FREQUENCIES
+
+    table = build_power_curves(np.arange(40.0, 130.0 + 1e-9, 0.5))
+    lam_opt, cp_max = optimal_lambda()
+    print(f"lambda_opt = {lam_opt:.3f}, Cp_max = {cp_max:.4f}")
+
+    speeds = [WIND_VELOCITIES[k] for k in WIND_VELOCITIES]
+    weights = [WIND_FREQUENCIES[k] for k in WIND_VELOCITIES]
+    for D in (70.0, 90.5, 110.0):
+        print(f"D = {D:5.1f} m | P(6 m/s) = {float(table.power_MW(D, 6.0)):.3f} MW | "
+              f"P(12.3 m/s) = {float(table.power_MW(D, 12.3)):.3f} MW | "
+              f"AEP = {float(table.annual_energy_MWh(D, speeds, weights)):,.0f} MWh")
@@ -0,0 +1,294 @@
+# === Batch Scenario Runner ===
+"""
+Runs the safety + cost + power optimiser for many scenarios at once, headless.
+
+A scenario file is either a JSON list of objects or a CSV with one scenario per row.
+Any of the columns below can be given, missing ones fall back to the module defaults:
+
+    name, V_power, V_max, D_min, D_cap, step, delta_max_frac,
+    production_volume_turbines, c_glass, c_carbon
+
+Usage (from the repository root):
+    python batch_runner.py scenarios.json -o results.csv --workers 4
+    python batch_runner.py scenarios.csv -o results.json --plot results.png
+
+The expensive parts (BVP deflection and BEM power) only depend on (D, V), so every
+unique (D, V) pair across all scenarios is evaluated once in a process pool and the
+results are shared by every scenario that needs them. matplotlib is only imported
+when --plot is given.
+
+With --tables DIR the workers read Cp(lambda) and the deflection influence coefficients
+from the memory-mapped tables written by precomputed_tables.py instead of solving BEM and
+BVPs. The tables are (re)built over the scenario diameters first if the directory has no
+manifest or its tables do not cover them. Final_optimal_diameter (and its lambda_opt
+solve) is only imported by the processes that need it, so table workers start without it.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from ODE_group.ODE_code import WIND_VELOCITIES, DeflectionDiagnostics
+from Blade_cost_Regression.blade_size_cost import (
+    C_glass,
+    C_carbon,
+    blade_cost_arrays,
+    num_blades,
+    production_volume_turbines,
+)
+from Power.power_and_cp_root_finding import expected_power_MW
+
+
+# PARAMETERS
+SCENARIO_DEFAULTS = {
+    "name": None,
+    "V_power": 6.0,                                     # site wind for power (m/s)
+    "V_max": max(WIND_VELOCITIES.values()),             # design wind for deflection (m/s)
+    "D_min": 40.0,
+    "D_cap": None,                                      # Final_optimal_diameter.D_CAP
+    "step": 0.5,
+    "delta_max_frac": None,                             # Final_optimal_diameter.DELTA_MAX_FRAC
+    "production_volume_turbines": production_volume_turbines,
+    "c_glass": C_glass,
+    "c_carbon": C_carbon,
+}
+
+OUTPUT_COLUMNS = [
+    "name", "V_power", "V_max", "D_min", "D_cap", "step", "delta_max_frac",
+    "production_volume_turbines", "c_glass", "c_carbon",
+    "n_safe", "D_opt_m", "expected_power_MW", "cost_GBP", "objective_MW_per_GBP",
+]
+
+CHUNK_SIZE = 16     # (D, V) pairs sent to a worker at a time
+DIAGNOSTICS_SAMPLE_RATE = 0.25      # fraction of the BVP solves checked against the analytic solution
+
+_tables = None      # PrecomputedTables of this process, set by _init_worker
+
+
+# SCENARIO FILES
+def _parse_value(key, value):
+    if value is None or value == "":
+        return None
+    if key == "name":
+        return str(value)
+    if key == "production_volume_turbines":
+        return int(float(value))
+    return float(value)
+
+def load_scenarios(path):
+    """
+    Read a JSON or CSV scenario file and return a list of complete scenario dicts.
+    """
+    from Final_optimal_diameter import D_CAP, DELTA_MAX_FRAC
+    defaults = dict(SCENARIO_DEFAULTS, D_cap=float(D_CAP), delta_max_frac=DELTA_MAX_FRAC)
+
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as fh:
+            rows = json.load(fh)
+    else:
+        with open(path, newline="", encoding="utf-8") as fh:
+            rows = list(csv.DictReader(fh))
+
+    scenarios = []
+    for i, row in enumerate(rows):
+        unknown = set(row) - set(SCENARIO_DEFAULTS)
+        if unknown:
+            raise ValueError(f"Scenario {i}: unknown columns {sorted(unknown)}")
+        scenario = dict(defaults)
+        for key, value in row.items():
+            value = _parse_value(key, value)
+            if value is not None:
+                scenario[key] = value
+        if scenario["name"] is None:
+            scenario["name"] = f"scenario_{i}"
+        scenarios.append(scenario)
+    return scenarios
+
+def diameter_grid(scenario):
+    return np.round(np.arange(scenario["D_min"], scenario["D_cap"] + 1e-9, scenario["step"]), 9)
+
+
+# WORKERS
+def _init_worker(tables_dir=None):
+    global _tables
+    if tables_dir is not None:
+        from precomputed_tables import open_tables
+        _tables = open_tables(tables_dir)
+
+def _deflection_chunk(pairs):
+    # Returns the deflections and the report of the chunk's deflection checks, which are
+    # collected instead of warning on every solve
+    with DeflectionDiagnostics(severity="collect", sample_rate=DIAGNOSTICS_SAMPLE_RATE) as diag:
+        if _tables is not None:
+            D, V = np.array(pairs).T
+            values = [float(y) for y in _tables.worstcase_tip_deflection(D, V)]
+        else:
+            from Final_optimal_diameter import worstcase_tip_deflection
+            values = [worstcase_tip_deflection(D, V) for D, V in pairs]
+    return values, diag.report()
+
+def _power_chunk(pairs):
+    if _tables is not None:
+        D, V = np.array(pairs).T
+        return [float(p) for p in _tables.power_MW(D, V)]
+    return [float(expected_power_MW(D, V)) for D, V in pairs]
+
+def _chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def _report(label, done, total, t0):
+    elapsed = time.perf_counter() - t0
+    rate = done / elapsed if elapsed > 0 else float("inf")
+    print(f"\r{label}: {done}/{total} ({rate:,.1f}/s)", end="", file=sys.stderr, flush=True)
+
+def evaluate_pairs(func, pairs, pool, label, diagnostics=None):
+    """
+    Evaluate func over unique (D, V) pairs, in the pool if one is given.
+    Returns a dict {(D, V): value} used as the shared cache for all scenarios.
+    With diagnostics given, func returns (values, diagnostics report) and the reports
+    are merged into it.
+    """
+    cache = {}
+    t0 = time.perf_counter()
+    chunks = _chunks(pairs, CHUNK_SIZE)
+
+    def store(chunk, result):
+        if diagnostics is not None:
+            result, report = result
+            diagnostics.merge(report)
+        cache.update(zip(chunk, result))
+        _report(label, len(cache), len(pairs), t0)
+
+    if pool is None:
+        for chunk in chunks:
+            store(chunk, func(chunk))
+    else:
+        futures = {pool.submit(func, chunk): chunk for chunk in chunks}
+        for fut in as_completed(futures):
+            store(futures[fut], fut.result())
+    print(file=sys.stderr)
+    return cache
+
+
+# SCENARIO EVALUATION
+def optimise_scenario(scenario, deflections, powers):
+    """
+    Same objective as optimise_over_safe_diameters, but reading deflection and
+    power from the shared caches instead of recomputing them.
+    """
+    cost_kwargs = {
+        "production_blades": scenario["production_volume_turbines"] * num_blades,
+        "c_glass": scenario["c_glass"],
+        "c_carbon": scenario["c_carbon"],
+    }
+    safe = [D for D in diameter_grid(scenario)
+            if not (deflections[(D, scenario["V_max"])] > scenario["delta_max_frac"] * D / 2.0
+                    or D > scenario["D_cap"])]
+
+    row = dict(scenario, n_safe=len(safe))
+    if not safe:
+        row.update(D_opt_m=np.nan, objective_MW_per_GBP=np.nan, expected_power_MW=np.nan, cost_GBP=np.nan)
+        return row
+    power = np.array([powers[(D, scenario["V_power"])] for D in safe])
+    cost = np.array(blade_cost_arrays(np.array(safe) / 2.0, **cost_kwargs)["turbine_cost"])
+    score = power / cost
+    i = int(np.argmax(score))
+    row.update(D_opt_m=safe[i], objective_MW_per_GBP=float(score[i]), expected_power_MW=float(power[i]),
+               cost_GBP=float(cost[i]))
+    return row
+
+def run_batch(scenarios, workers=None, tables_dir=None):
+    """
+    Evaluate every scenario and return the results as columns {name: list}.
+    workers=1 runs everything in this process. tables_dir switches the workers to the
+    precomputed tables.
+    """
+    defl_pairs, power_pairs = set(), set()
+    for sc in scenarios:
+        for D in diameter_grid(sc):
+            defl_pairs.add((D, sc["V_max"]))
+            power_pairs.add((D, sc["V_power"]))
+    defl_pairs, power_pairs = sorted(defl_pairs), sorted(power_pairs)
+
+    t0 = time.perf_counter()
+    diagnostics = DeflectionDiagnostics(severity="collect")
+    if workers == 1:
+        _init_worker(tables_dir)
+        deflections = evaluate_pairs(_deflection_chunk, defl_pairs, None, "deflection", diagnostics)
+        powers = evaluate_pairs(_power_chunk, power_pairs, None, "power")
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tables_dir,)) as pool:
+            deflections = evaluate_pairs(_deflection_chunk, defl_pairs, pool, "deflection", diagnostics)
+            powers = evaluate_pairs(_power_chunk, power_pairs, pool, "power")
+
+    rows = [optimise_scenario(sc, deflections, powers) for sc in scenarios]
+    elapsed = time.perf_counter() - t0
+    print(
+        f"{len(scenarios)} scenarios, {len(defl_pairs)} BVP + {len(power_pairs)} BEM evaluations "
+        f"in {elapsed:.2f} s ({len(scenarios) / elapsed:,.1f} scenarios/s)",
+        file=sys.stderr,
+    )
+    if diagnostics.calls:
+        print(diagnostics.summary(), file=sys.stderr)
+    return {col: [row[col] for row in rows] for col in OUTPUT_COLUMNS}
+
+
+# OUTPUT
+def write_results(columns, path):
+    if path.lower().endswith(".json"):
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(columns, fh, indent=1, default=float)
+    else:
+        with open(path, "w", newline="", encoding="utf-8") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(OUTPUT_COLUMNS)
+            writer.writerows(zip(*(columns[col] for col in OUTPUT_COLUMNS)))
+
+def plot_results(columns, path):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(8, 5))
+    plt.bar(columns["name"], columns["D_opt_m"], color="tab:blue")
+    plt.ylabel("Optimal diameter (m)")
+    plt.title("Optimal diameter per scenario")
+    plt.xticks(rotation=45, ha="right")
+    plt.tight_layout()
+    plt.savefig(path)
+    print(f"Saved '{path}'", file=sys.stderr)
+
+
+# MAIN EXECUTION
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the turbine diameter optimiser for a file of scenarios.")
+    parser.add_argument("scenarios", help="JSON or CSV scenario file")
+    parser.add_argument("-o", "--output", default="batch_results.csv", help="CSV or JSON output file")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--plot", default=None, help="also save a bar chart of D_opt to this file")
+    parser.add_argument("--tables", default=None, help="use (and if needed build) precomputed tables in this directory")
+    args = parser.parse_args(argv)
+
+    scenarios = load_scenarios(args.scenarios)
+    if args.tables:
+        from precomputed_tables import PrecomputedTables, build_tables
+        diameters = np.unique(np.concatenate([diameter_grid(sc) for sc in scenarios]))
+        if (not os.path.exists(os.path.join(args.tables, "manifest.json"))
+                or not PrecomputedTables(args.tables).covers(diameters)):
+            print(f"Building tables in '{args.tables}' for D = {diameters[0]:g} - {diameters[-1]:g} m", file=sys.stderr)
+            build_tables(args.tables, diameters=diameters)
+    columns = run_batch(scenarios, workers=args.workers, tables_dir=args.tables)
+    write_results(columns, args.output)
+    print(f"Saved '{args.output}'", file=sys.stderr)
+    if args.plot:
+        plot_results(columns, args.plot)
+
+
+if __name__ == "__main__":
+    main()
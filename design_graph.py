@@ -0,0 +1,201 @@
+# === Incremental Design Evaluation Graph ===
+"""
+The optimisation pipeline split into stages with declared inputs:
+
+    grid ──────────────┬─────────────┬──────────────┐
+    aero ──> loads ──> deflection ──> feasibility ──┤
+    V_power ──> power ──────────────────────────────┼──> score
+    materials ──> cost ─────────────────────────────┘
+
+Every stage result is cached under the values of the parameters it (transitively)
+depends on. Changing one parameter therefore only recomputes the stages downstream of
+it, e.g. a new carbon price re-runs materials -> cost -> score but reuses every BVP
+deflection, and a new Young's modulus re-runs the deflections but not the power or cost.
+
+Usage (from the repository root):
+    python design_graph.py
+"""
+
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from ODE_group.ODE_code import (
+    BLADE_YOUNGS_MODULUS,
+    WIND_VELOCITIES,
+    DeflectionDiagnostics,
+    loads_for_DV,
+    solve_tip_deflection_for_length,
+)
+from Blade_cost_Regression.blade_size_cost import (
+    C_glass,
+    C_carbon,
+    blade_cost_arrays,
+    num_blades,
+    production_volume_turbines,
+)
+from Power.power_and_cp_root_finding import expected_power_MW_array
+from Final_optimal_diameter import D_CAP, DELTA_MAX_FRAC, LAMBDA_OPT
+
+
+# PARAMETERS
+DEFAULT_PARAMS = {
+    "V_power": 6.0,
+    "V_max": max(WIND_VELOCITIES.values()),
+    "D_min": 40.0,
+    "D_cap": float(D_CAP),
+    "step": 0.5,
+    "delta_max_frac": DELTA_MAX_FRAC,
+    "E": BLADE_YOUNGS_MODULUS,
+    "production_volume_turbines": production_volume_turbines,
+    "c_glass": C_glass,
+    "c_carbon": C_carbon,
+}
+
+STAGE_CACHE_SIZE = 16       # cached results kept per stage
+
+
+# STAGES
+def _grid(D_min, D_cap, step):
+    return np.arange(D_min, D_cap + 1e-9, step)
+
+def _aero():
+    return {"lambda_opt": LAMBDA_OPT}
+
+def _power(grid, V_power):
+    return expected_power_MW_array(grid, V_power)
+
+def _loads(grid, aero, V_max):
+    omega = aero["lambda_opt"] * V_max / (grid / 2.0)
+    a_r, b_const, rl_const = loads_for_DV(V_max, omega)
+    return {"a_r": a_r, "b_const": b_const, "rl_const": rl_const}
+
+def _deflection(grid, loads, E):
+    return np.array([
+        solve_tip_deflection_for_length(D / 2.0, a_r, loads["b_const"], loads["rl_const"], E)
+        for D, a_r in zip(grid, loads["a_r"])
+    ])
+
+def _feasibility(grid, deflection, delta_max_frac, D_cap):
+    return (deflection <= delta_max_frac * grid / 2.0) & (grid <= D_cap)
+
+def _materials(c_glass, c_carbon, production_volume_turbines):
+    return {"c_glass": c_glass, "c_carbon": c_carbon,
+            "production_blades": production_volume_turbines * num_blades}
+
+def _cost(grid, materials):
+    return np.array(blade_cost_arrays(grid / 2.0, **materials)["turbine_cost"])
+
+def _score(grid, power, cost, feasibility):
+    if not feasibility.any():
+        raise RuntimeError("No structurally safe diameters!")
+    score = np.where(feasibility, power / cost, -np.inf)
+    i = int(np.argmax(score))
+    return {
+        "D_opt_m": grid[i],
+        "objective_MW_per_GBP": score[i],
+        "expected_power_MW": power[i],
+        "cost_GBP": cost[i],
+        "safe_diameters": grid[feasibility],
+    }
+
+# stage name -> (inputs, function); inputs are parameter or stage names
+STAGES = {
+    "grid": (("D_min", "D_cap", "step"), _grid),
+    "aero": ((), _aero),
+    "power": (("grid", "V_power"), _power),
+    "loads": (("grid", "aero", "V_max"), _loads),
+    "deflection": (("grid", "loads", "E"), _deflection),
+    "feasibility": (("grid", "deflection", "delta_max_frac", "D_cap"), _feasibility),
+    "materials": (("c_glass", "c_carbon", "production_volume_turbines"), _materials),
+    "cost": (("grid", "materials"), _cost),
+    "score": (("grid", "power", "cost", "feasibility"), _score),
+}
+
+
+class DesignGraph:
+    """
+    Evaluates the pipeline stages on demand and caches them by the parameter values they depend on.
+    The deflection checks of every stage evaluation are collected in self.diagnostics.
+    """
+
+    def __init__(self, **params):
+        unknown = set(params) - set(DEFAULT_PARAMS)
+        if unknown:
+            raise KeyError(f"Unknown parameters {sorted(unknown)}")
+        self.params = dict(DEFAULT_PARAMS, **params)
+        self.depends_on = {stage: self._param_closure(stage) for stage in STAGES}
+        self.cache = {stage: OrderedDict() for stage in STAGES}
+        self.evaluations = {stage: 0 for stage in STAGES}
+        self.last_recomputed = []
+        self.diagnostics = DeflectionDiagnostics(severity="collect")
+
+    def _param_closure(self, stage):
+        params = set()
+        for name in STAGES[stage][0]:
+            params |= self._param_closure(name) if name in STAGES else {name}
+        return frozenset(params)
+
+    def _key(self, stage, params):
+        return tuple(params[p] for p in sorted(self.depends_on[stage]))
+
+    def _get(self, stage, params):
+        key = self._key(stage, params)
+        cache = self.cache[stage]
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+
+        inputs, func = STAGES[stage]
+        kwargs = {name: self._get(name, params) if name in STAGES else params[name] for name in inputs}
+        with self.diagnostics:
+            value = func(**kwargs)
+        self.evaluations[stage] += 1
+        self.last_recomputed.append(stage)
+
+        cache[key] = value
+        if len(cache) > STAGE_CACHE_SIZE:
+            cache.popitem(last=False)
+        return value
+
+    def set(self, **changes):
+        """Change parameters permanently; nothing is recomputed until a stage is requested."""
+        unknown = set(changes) - set(self.params)
+        if unknown:
+            raise KeyError(f"Unknown parameters {sorted(unknown)}")
+        self.params.update(changes)
+
+    def get(self, stage="score"):
+        self.last_recomputed = []
+        return self._get(stage, self.params)
+
+    def what_if(self, stage="score", **changes):
+        """Evaluate a stage with some parameters changed, without changing the graph's parameters."""
+        unknown = set(changes) - set(self.params)
+        if unknown:
+            raise KeyError(f"Unknown parameters {sorted(unknown)}")
+        self.last_recomputed = []
+        return self._get(stage, dict(self.params, **changes))
+
+    def affected_stages(self, param):
+        """Stages that have to be recomputed when param changes."""
+        return [stage for stage in STAGES if param in self.depends_on[stage]]
+
+
+# MAIN EXECUTION
+if __name__ == "__main__":
+    graph = DesignGraph()
+
+    def timed(label, func):
+        t0 = time.perf_counter()
+        out = func()
+        print(f"{label:<28} D_opt = {out['D_opt_m']:.1f} m | {1000 * (time.perf_counter() - t0):8.1f} ms | "
+              f"recomputed: {', '.join(graph.last_recomputed) or '-'}")
+
+    timed("baseline", graph.get)
+    timed("carbon at £14k/m^3", lambda: graph.what_if(c_carbon=14_000.0))
+    timed("E 10% lower", lambda: graph.what_if(E=0.9 * DEFAULT_PARAMS["E"]))
+    timed("site wind 8 m/s", lambda: graph.what_if(V_power=8.0))
+    timed("baseline again", graph.get)
+    print(graph.diagnostics.summary())
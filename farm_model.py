@@ -0,0 +1,141 @@
+# === Wind Farm Model (Jensen / Park wake) ===
+"""
+Farm-level evaluation for N turbines of the same diameter D.
+
+For every wind direction the pairwise down-wind / cross-wind distances between all
+turbines are built as (n_directions, N, N) NumPy arrays. Each upstream turbine casts a
+Jensen (Park) top-hat wake that expands linearly with distance; the velocity deficit
+it causes at a down-wind rotor is weighted by the fraction of that rotor covered by
+the wake, and deficits from several wakes are combined by root-sum-square. The
+resulting inflow speed of each turbine is passed through the variable-speed power curve
+of Power.power_curve (Cp_max at the optimal tip-speed ratio up to rated power, parked
+outside cut-in/cut-out), built once per diameter and interpolated for every turbine and
+direction. Power rises with the inflow speed up to rating, so a wake never adds power.
+
+Usage (from the repository root):
+    python farm_model.py
+"""
+
+import math
+import time
+
+import numpy as np
+
+from ODE_group.ODE_code import WIND_VELOCITIES
+from Power.power_curve import build_power_curves
+
+
+# PARAMETERS
+WAKE_DECAY = 0.075          # Jensen wake decay constant k, typical onshore value
+THRUST_COEF = 0.8           # rotor thrust coefficient used for the wake deficit
+
+
+# POWER
+def turbine_power_MW(D, V, curves=None):
+    """
+    Power (MW) for turbines of diameter D in inflow speeds V (any array shape), from the
+    variable-speed power curve. curves is a PowerCurveTable covering D (built if not given).
+    """
+    if curves is None:
+        curves = build_power_curves([D])
+    return curves.power_MW(D, V)
+
+
+# WAKE MODEL
+def _overlap_fraction(d, R, R_w):
+    """
+    Fraction of a rotor disc (radius R) covered by a wake circle (radius R_w) whose
+    centre is a distance d away. All arguments broadcast.
+    """
+    d = np.maximum(d, 1e-12)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        c1 = np.clip((d**2 + R**2 - R_w**2) / (2 * d * R), -1.0, 1.0)
+        c2 = np.clip((d**2 + R_w**2 - R**2) / (2 * d * R_w), -1.0, 1.0)
+        lens = (R**2 * np.arccos(c1) + R_w**2 * np.arccos(c2)
+                - 0.5 * np.sqrt(np.maximum((-d + R + R_w) * (d + R - R_w) * (d - R + R_w) * (d + R + R_w), 0.0)))
+    area = np.where(d >= R + R_w, 0.0,
+                    np.where(d <= np.abs(R_w - R), math.pi * np.minimum(R, R_w)**2, lens))
+    return area / (math.pi * R**2)
+
+def wake_deficits(positions, D, directions_deg, k=WAKE_DECAY, Ct=THRUST_COEF):
+    """
+    Combined fractional velocity deficit at each turbine, shape (n_directions, N).
+    positions : (N, 2) array of x (east) and y (north) coordinates in metres.
+    directions_deg : directions the wind blows FROM, meteorological convention (0 = north).
+    """
+    positions = np.asarray(positions, dtype=float)
+    theta = np.radians(np.atleast_1d(directions_deg))
+    # unit vector the wind travels along
+    ux, uy = -np.sin(theta), -np.cos(theta)
+
+    rel_x = positions[None, :, 0] - positions[:, None, 0]          # x_j - x_i, shape (N, N)
+    rel_y = positions[None, :, 1] - positions[:, None, 1]
+    downwind = ux[:, None, None] * rel_x + uy[:, None, None] * rel_y        # (n_dir, N, N)
+    crosswind = np.abs(-uy[:, None, None] * rel_x + ux[:, None, None] * rel_y)
+
+    R = D / 2.0
+    in_front = downwind > 0.0
+    dist = np.where(in_front, downwind, 0.0)
+    R_wake = R + k * dist
+    deficit = (1.0 - math.sqrt(1.0 - Ct)) * (R / R_wake)**2
+    deficit *= np.where(in_front, _overlap_fraction(crosswind, R, R_wake), 0.0)
+
+    # root-sum-square over the upstream turbines i
+    return np.sqrt(np.sum(deficit**2, axis=1))
+
+def evaluate_farm(positions, D, V_inf, directions_deg, direction_weights=None, k=WAKE_DECAY, Ct=THRUST_COEF,
+                  curves=None):
+    """
+    Per-turbine inflow and power for every wind direction.
+    V_inf is the free-stream speed, either a scalar or one value per direction.
+    curves is the PowerCurveTable to use (built for D if not given).
+    Returns a dict of arrays; farm totals are weighted by direction_weights (uniform by default).
+    """
+    directions_deg = np.atleast_1d(np.asarray(directions_deg, dtype=float))
+    V_inf = np.broadcast_to(np.asarray(V_inf, dtype=float), directions_deg.shape)
+    if direction_weights is None:
+        direction_weights = np.full(directions_deg.shape, 1.0 / directions_deg.size)
+    direction_weights = np.asarray(direction_weights, dtype=float)
+
+    deficit = wake_deficits(positions, D, directions_deg, k, Ct)
+    inflow = V_inf[:, None] * (1.0 - deficit)
+    if curves is None:
+        curves = build_power_curves([D])
+    power = turbine_power_MW(D, inflow, curves)
+    free_power = turbine_power_MW(D, V_inf, curves)[:, None] * np.ones(power.shape[1])
+
+    farm_power = power.sum(axis=1)
+    mean_power = float(np.dot(direction_weights, farm_power))
+    mean_free = float(np.dot(direction_weights, free_power.sum(axis=1)))
+    return {
+        "inflow_m_s": inflow,                       # (n_dir, N)
+        "power_MW": power,                          # (n_dir, N)
+        "farm_power_MW": farm_power,                # (n_dir,)
+        "mean_farm_power_MW": mean_power,
+        "wake_loss_fraction": 1.0 - mean_power / mean_free if mean_free > 0 else 0.0,
+    }
+
+def grid_layout(n_rows, n_cols, D, spacing_D=(7.0, 5.0)):
+    """
+    Regular rectangular layout, spacing given in rotor diameters (along x, along y).
+    """
+    xs = np.arange(n_cols) * spacing_D[0] * D
+    ys = np.arange(n_rows) * spacing_D[1] * D
+    X, Y = np.meshgrid(xs, ys)
+    return np.column_stack((X.ravel(), Y.ravel()))
+
+
+# MAIN EXECUTION
+if __name__ == "__main__":
+    D = 90.5
+    layout = grid_layout(10, 20, D)                  # 200 turbines
+    directions = np.arange(0.0, 360.0, 10.0)         # 36 directions
+
+    curves = build_power_curves([D])                 # power curve built once, outside the timing
+    t0 = time.perf_counter()
+    out = evaluate_farm(layout, D, WIND_VELOCITIES["moderate"], directions, curves=curves)
+    elapsed = time.perf_counter() - t0
+
+    print(f"{layout.shape[0]} turbines x {directions.size} directions evaluated in {elapsed * 1000:.1f} ms")
+    print(f"Mean farm power at {WIND_VELOCITIES['moderate']} m/s = {out['mean_farm_power_MW']:.2f} MW")
+    print(f"Wake loss = {100 * out['wake_loss_fraction']:.1f} %")
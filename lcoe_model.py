@@ -0,0 +1,208 @@
+# === Levelised Cost of Energy (LCOE) Pipeline ===
+"""
+Ranks rotor diameters by levelised cost of energy instead of MW per £ of blade cost.
+
+    CAPEX  = blades (blade_cost_arrays, all blades of the rotor)
+           + nacelle/drivetrain and balance of plant, per kW of rated power
+           + tower and foundation, scaled from the reference turbine with diameter
+    OPEX   = per kW of rated power per year
+    AEP    = variable-speed power curve (Power.power_curve) over a wind speed
+             distribution, times availability, degrading by a fixed fraction per year
+
+    LCOE = (CAPEX + sum_t OPEX / (1+r)^t) / (sum_t AEP_t / (1+r)^t),  t = 1 .. lifetime
+
+Both discounted sums are geometric series and are evaluated in closed form, so the
+LCOE of every (diameter, discount rate, lifetime) combination comes out of one
+broadcast expression, shape (n_diameters, n_rates, n_lifetimes). Diameters are ranked
+within each (discount rate, lifetime) scenario; comparing LCOE across scenarios only
+says which financing is cheaper.
+
+By default every diameter carries the 2.3 MW generator of the G93 (REFERENCE_RATING),
+which is the project question: a larger rotor raises the capacity factor at the cost of
+blades, tower and foundation. Scaling the rating with swept area instead keeps the
+capacity factor fixed and the per-kW costs then favour the smallest rotor.
+The cost figures are order-of-magnitude onshore values and are meant to be replaced.
+
+With these figures the LCOE optimum is interior but lies at about 125-150 m (depending
+on discount rate and lifetime), above the largest structurally safe diameter (106 m at
+the 10 % deflection limit). Over the safe diameters the LCOE therefore falls
+monotonically, and the ranking cannot tell them apart beyond "larger is cheaper": it
+is just the diameters in decreasing size, and the best one is the deflection limit.
+lcoe_pipeline flags this per scenario (size_ordered, constraint_bound), and the main
+also evaluates an extended, structurally unchecked range to show where the
+cost-of-energy optimum would be.
+
+Usage (from the repository root):
+    python lcoe_model.py
+"""
+
+import time
+
+import numpy as np
+
+from Blade_cost_Regression.blade_size_cost import blade_cost_arrays
+from Power.power_curve import REFERENCE_RATING, build_power_curves
+from Power.power_and_cp_root_finding import V_wind
+
+
+# PARAMETERS (£, onshore, reference turbine REFERENCE_RATING)
+NACELLE_COST_PER_KW = 450.0         # drivetrain, generator, converter, hub and pitch
+BOP_COST_PER_KW = 300.0             # roads, cabling, grid connection, installation
+TOWER_REF_COST = 600_000.0          # tower of the reference turbine
+TOWER_EXPONENT = 2.5                # thrust ~ D^2 and height ~ D
+FOUNDATION_REF_COST = 250_000.0
+FOUNDATION_EXPONENT = 2.0
+OPEX_PER_KW_YEAR = 45.0             # operation and maintenance
+AVAILABILITY = 0.97
+DEGRADATION_PER_YEAR = 0.005        # fractional AEP loss per year
+
+DISCOUNT_RATES = np.linspace(0.02, 0.12, 51)
+LIFETIMES_YEARS = np.arange(15, 31)
+
+
+def rayleigh_wind_distribution(mean_speed=V_wind, wind_speeds=None):
+    """
+    Wind speed bins and their probabilities for a Rayleigh (Weibull k = 2) distribution
+    with the given annual mean.
+    """
+    if wind_speeds is None:
+        wind_speeds = np.arange(0.0, 30.0 + 1e-9, 0.5)
+    wind_speeds = np.asarray(wind_speeds, dtype=float)
+    scale = 2.0 * mean_speed / np.sqrt(np.pi)
+    pdf = (np.pi / 2.0) * (wind_speeds / mean_speed**2) * np.exp(-(wind_speeds / scale)**2)
+    return wind_speeds, pdf / pdf.sum()
+
+
+def capital_costs(diameters, rated_power_MW, **cost_kwargs):
+    """CAPEX breakdown (£) per diameter; cost_kwargs go to blade_cost_arrays."""
+    D = np.asarray(diameters, dtype=float)
+    D_ref = REFERENCE_RATING[0]
+    rated_kW = 1000.0 * rated_power_MW
+    costs = {
+        "blades": np.array(blade_cost_arrays(D / 2.0, **cost_kwargs)["turbine_cost"]),
+        "nacelle": NACELLE_COST_PER_KW * rated_kW,
+        "balance_of_plant": BOP_COST_PER_KW * rated_kW,
+        "tower": TOWER_REF_COST * (D / D_ref)**TOWER_EXPONENT,
+        "foundation": FOUNDATION_REF_COST * (D / D_ref)**FOUNDATION_EXPONENT,
+    }
+    costs["total"] = sum(costs.values())
+    return costs
+
+
+def discount_factors(discount_rates, lifetimes_years, degradation=DEGRADATION_PER_YEAR):
+    """
+    Present value of £1 per year and of a unit of first-year energy degrading by
+    `degradation` per year, over each lifetime. Shapes (n_rates, n_lifetimes).
+    """
+    r = np.asarray(discount_rates, dtype=float)[:, None]
+    n = np.asarray(lifetimes_years, dtype=float)[None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cost_pv = np.where(r == 0, n, (1.0 - (1.0 + r)**-n) / r)
+        q = (1.0 - degradation) / (1.0 + r)
+        energy_pv = np.where(np.isclose(q, 1.0), n / (1.0 + r), (1.0 - q**n) / (1.0 - q) / (1.0 + r))
+    return cost_pv, energy_pv
+
+
+def lcoe_pipeline(diameters, discount_rates=DISCOUNT_RATES, lifetimes_years=LIFETIMES_YEARS,
+                  wind_speeds=None, weights=None, rated_power_MW=None, availability=AVAILABILITY,
+                  degradation=DEGRADATION_PER_YEAR, **cost_kwargs):
+    """
+    LCOE (£/MWh) for every diameter x discount rate x lifetime.
+    wind_speeds/weights default to a Rayleigh distribution with the 6 m/s site mean,
+    rated_power_MW (scalar or per diameter) to the 2.3 MW reference rating.
+    Returns a dict with the per-diameter terms, the lcoe array of shape
+    (n_diameters, n_rates, n_lifetimes) and the best diameter per (rate, lifetime).
+    constraint_bound marks the scenarios whose best diameter is the largest one given,
+    i.e. the LCOE is still falling there and the diameter range (e.g. the structural
+    limit of get_safe_diameters) sets the optimum. size_ordered marks the scenarios where
+    the LCOE falls monotonically over the whole range, so the ranking only orders the
+    diameters by size.
+    """
+    D = np.asarray(diameters, dtype=float)
+    if wind_speeds is None:
+        wind_speeds, weights = rayleigh_wind_distribution()
+    if rated_power_MW is None:
+        rated_power_MW = REFERENCE_RATING[1]
+    rated_power_MW = np.broadcast_to(np.asarray(rated_power_MW, dtype=float), D.shape)
+
+    # power curves evaluated directly at the wind speed bins, one row per diameter
+    curves = build_power_curves(D, wind_speeds, rated_power_MW=rated_power_MW)
+    aep = availability * curves.annual_energy_MWh(D, wind_speeds, weights)
+
+    capex = capital_costs(D, rated_power_MW, **cost_kwargs)
+    opex = OPEX_PER_KW_YEAR * 1000.0 * rated_power_MW
+    cost_pv, energy_pv = discount_factors(discount_rates, lifetimes_years, degradation)
+
+    lifetime_cost = capex["total"][:, None, None] + opex[:, None, None] * cost_pv[None]
+    lifetime_energy = aep[:, None, None] * energy_pv[None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lcoe = np.where(lifetime_energy > 0, lifetime_cost / lifetime_energy, np.inf)
+
+    best = np.argmin(lcoe, axis=0)
+    return {
+        "diameters": D,
+        "discount_rates": np.asarray(discount_rates, dtype=float),
+        "lifetimes_years": np.asarray(lifetimes_years, dtype=float),
+        "rated_power_MW": rated_power_MW,
+        "aep_MWh": aep,
+        "capacity_factor": aep / (8760.0 * rated_power_MW),
+        "capex": capex,
+        "opex_per_year": opex,
+        "lcoe": lcoe,
+        "best_D_m": D[best],
+        "best_lcoe": np.min(lcoe, axis=0),
+        "constraint_bound": D[best] >= D.max(),
+        "size_ordered": np.all(np.diff(lcoe[np.argsort(D)], axis=0) <= 0, axis=0),
+    }
+
+
+def rank_diameters(result, top=10):
+    """
+    The `top` diameters with the lowest LCOE within every (discount rate, lifetime)
+    scenario, best first. Returns (diameters, lcoe), both of shape
+    (top, n_rates, n_lifetimes); rank 0 is best_D_m / best_lcoe.
+    """
+    order = np.argsort(result["lcoe"], axis=0, kind="stable")[:top]
+    return result["diameters"][order], np.take_along_axis(result["lcoe"], order, axis=0)
+
+
+# MAIN EXECUTION
+if __name__ == "__main__":
+    from ODE_group.ODE_code import DeflectionDiagnostics
+    from Final_optimal_diameter import get_safe_diameters, optimise_over_safe_diameters
+
+    diagnostics = DeflectionDiagnostics(severity="collect")
+    safe_D = get_safe_diameters(diagnostics=diagnostics)
+    t0 = time.perf_counter()
+    result = lcoe_pipeline(safe_D)
+    elapsed = time.perf_counter() - t0
+    print(f"{result['lcoe'].size:,} (diameter, discount rate, lifetime) combinations in {elapsed:.2f} s")
+
+    j = int(np.argmin(np.abs(result["discount_rates"] - 0.06)))
+    k = int(np.argmin(np.abs(result["lifetimes_years"] - 20)))
+    i = int(np.argmin(result["lcoe"][:, j, k]))
+    print(f"6% / 20 years: best D = {result['diameters'][i]:.1f} m, LCOE = £{result['lcoe'][i, j, k]:.1f}/MWh, "
+          f"capacity factor {result['capacity_factor'][i]:.1%}")
+    ranked_D, ranked_lcoe = rank_diameters(result, top=3)
+    print("  ranking: " + ", ".join(f"{d:.1f} m (£{v:.1f}/MWh)"
+                                    for d, v in zip(ranked_D[:, j, k], ranked_lcoe[:, j, k])))
+    print(f"MW per £ of blade cost (optimise_over_safe_diameters): D = {optimise_over_safe_diameters(diagnostics=diagnostics)['D_opt_m']:.1f} m")
+
+    print("Best diameter by discount rate (20 years):",
+          ", ".join(f"{r:.0%}: {d:.1f} m" for r, d in zip(result["discount_rates"][::10], result["best_D_m"][::10, k])))
+    bound = result["constraint_bound"]
+    if bound.any():
+        print(f"The best diameter is the largest structurally safe one ({safe_D.max():.1f} m) in {bound.sum()} of "
+              f"{bound.size} (rate, lifetime) scenarios: the LCOE is still falling there, so the optimum is set "
+              f"by the deflection limit rather than by the cost of energy.")
+    ordered = result["size_ordered"]
+    if ordered.any():
+        print(f"In {ordered.sum()} of {ordered.size} scenarios the LCOE falls monotonically over all safe diameters, "
+              f"so the LCOE ranking there cannot tell diameters apart: it only orders them by size.")
+
+    unchecked = lcoe_pipeline(np.arange(safe_D.min(), 200.0 + 1e-9, 0.5))
+    D_free = unchecked["best_D_m"]
+    print(f"Without the deflection limit (not structurally checked) the LCOE optimum is interior: "
+          f"{D_free.min():.1f}-{D_free.max():.1f} m over all scenarios, "
+          f"{D_free[j, k]:.1f} m at 6% / 20 years.")
+    print(diagnostics.summary())
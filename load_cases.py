@@ -0,0 +1,140 @@
+# === Design Load Case Matrix ===
+"""
+Structural screening over a matrix of IEC-style design load cases instead of the single
+strong-gale case used by get_safe_diameters.
+
+Load cases are generated from the declarative LOAD_CASE_FAMILIES table, for every site
+wind speed and blade azimuth:
+
+    operating : rotor at lambda_opt for the wind speed
+    gust      : wind raised by the gust factor before the rotor speed has followed it
+    parked    : rotor stopped (no rotational load)
+    extreme   : parked rotor in the extreme wind speed (only for the highest wind speed)
+
+The azimuth psi sets the part of the blade weight that bends it flapwise,
+gravity load = m g cos(psi), so it adds to the rotational load with the blade on one
+side of the hub and opposes it on the other (psi = 0 is the reference case of ODE_code).
+
+Deflection is linear in the loads, so each diameter needs only the three unit-load BVP
+solves of deflection_influence_coefficients; every load case is then a few array
+operations. The governing (largest utilisation) case is reported for every design.
+
+Usage (from the repository root):
+    python load_cases.py
+"""
+
+import time
+
+import numpy as np
+
+from ODE_group.ODE_code import (
+    AIR_DENSITY,
+    BLADE_YOUNGS_MODULUS,
+    WIND_VELOCITIES,
+    DeflectionDiagnostics,
+    deflection_influence_coefficients,
+    loads_for_DV,
+)
+from Final_optimal_diameter import DELTA_MAX_FRAC, LAMBDA_OPT
+
+
+# PARAMETERS
+GUST_FACTOR = 1.4               # peak gust / mean wind, IEC extreme operating gust order of magnitude
+EXTREME_WIND_FACTOR = 1.4       # V_e50 / V_ref as in IEC 61400-1, applied to the highest site wind
+AZIMUTHS_DEG = np.arange(0.0, 360.0, 30.0)
+
+# family -> wind multiplier, rotor state, which wind speeds it is applied to and the
+# partial safety factor on the deflection (1.0 keeps the allowable of DELTA_MAX_FRAC as is)
+LOAD_CASE_FAMILIES = {
+    "operating": {"wind_factor": 1.0, "rotor": "operating", "wind_speeds": "all", "safety_factor": 1.0},
+    "gust": {"wind_factor": GUST_FACTOR, "rotor": "operating", "wind_speeds": "all", "safety_factor": 1.0},
+    "parked": {"wind_factor": 1.0, "rotor": "parked", "wind_speeds": "all", "safety_factor": 1.0},
+    "extreme": {"wind_factor": EXTREME_WIND_FACTOR, "rotor": "parked", "wind_speeds": "max", "safety_factor": 1.0},
+}
+
+
+def load_case_matrix(families=LOAD_CASE_FAMILIES, wind_speeds=WIND_VELOCITIES, azimuths_deg=AZIMUTHS_DEG):
+    """
+    Expand the families over wind speeds and azimuths. Returns a dict of 1-D arrays,
+    one entry per load case:
+    name, family, V_load (wind on the blade), V_rotor (wind the rotor speed follows),
+    tsr (tip-speed ratio of the rotor, 0 when parked), gravity_factor (cos psi), safety_factor.
+    """
+    V_max_key = max(wind_speeds, key=wind_speeds.get)
+    cases = {k: [] for k in ("name", "family", "V_load", "V_rotor", "tsr", "gravity_factor", "safety_factor")}
+    for family, spec in families.items():
+        keys = list(wind_speeds) if spec["wind_speeds"] == "all" else [V_max_key]
+        for key in keys:
+            V = wind_speeds[key]
+            for psi in azimuths_deg:
+                cases["name"].append(f"{family}/{key}/{psi:g}deg")
+                cases["family"].append(family)
+                cases["V_load"].append(spec["wind_factor"] * V)
+                cases["V_rotor"].append(V)
+                cases["tsr"].append(LAMBDA_OPT if spec["rotor"] == "operating" else 0.0)
+                cases["gravity_factor"].append(np.cos(np.radians(psi)))
+                cases["safety_factor"].append(spec["safety_factor"])
+    return {k: np.array(v, dtype=object if k in ("name", "family") else float) for k, v in cases.items()}
+
+
+def evaluate_load_cases(diameters, cases=None, E=BLADE_YOUNGS_MODULUS, delta_max_frac=DELTA_MAX_FRAC,
+                        rho=AIR_DENSITY, tables=None):
+    """
+    Tip deflection of every diameter in every load case, shape (n_diameters, n_cases),
+    and the governing case per diameter. tables (a PrecomputedTables) supplies the
+    influence coefficients instead of solving the BVPs.
+    """
+    cases = load_case_matrix() if cases is None else cases
+    D = np.atleast_1d(np.asarray(diameters, dtype=float))
+    L = D / 2.0
+    if tables is not None:
+        c_ar, c_b, c_rl = (c[:, None] for c in tables.influence_coefficients(L))
+    else:
+        c_ar, c_b, c_rl = np.array([deflection_influence_coefficients(l, E) for l in L]).T[:, :, None]
+
+    omega = cases["tsr"][None, :] * cases["V_rotor"][None, :] / L[:, None]
+    a_r, b_const, rl_const = loads_for_DV(cases["V_load"][None, :], omega, rho)
+    y_flap = a_r * c_ar + b_const * cases["gravity_factor"][None, :] * c_b
+    y_edge = rl_const * c_rl
+    deflection = cases["safety_factor"][None, :] * np.hypot(y_flap, y_edge)
+
+    utilisation = deflection / (delta_max_frac * L[:, None])
+    governing = np.argmax(utilisation, axis=1)
+    rows = np.arange(D.size)
+    return {
+        "diameters": D,
+        "cases": cases,
+        "deflection": deflection,
+        "utilisation": utilisation,
+        "governing_case": cases["name"][governing],
+        "governing_family": cases["family"][governing],
+        "governing_deflection": deflection[rows, governing],
+        "governing_utilisation": utilisation[rows, governing],
+        "feasible": utilisation[rows, governing] <= 1.0,
+    }
+
+
+# MAIN EXECUTION
+if __name__ == "__main__":
+    from collections import Counter
+    from Final_optimal_diameter import worstcase_tip_deflection
+
+    D = np.arange(40.0, 130.0 + 1e-9, 0.5)
+    cases = load_case_matrix()
+    t0 = time.perf_counter()
+    screen = evaluate_load_cases(D, cases)
+    elapsed = time.perf_counter() - t0
+    print(f"{len(cases['name'])} load cases x {D.size} diameters in {elapsed:.2f} s "
+          f"({3 * D.size} BVP solves)")
+
+    # the operating strong-gale case at psi = 0 is the single case of get_safe_diameters
+    ref = list(cases["name"]).index("operating/strong_gale/0deg")
+    with DeflectionDiagnostics(severity="collect") as diagnostics:
+        check = [worstcase_tip_deflection(d) for d in D[::30]]
+    print(f"Max difference to worstcase_tip_deflection: {np.max(np.abs(screen['deflection'][::30, ref] - check)):.2e} m")
+    print(diagnostics.summary())
+
+    single_case = screen["deflection"][:, ref] <= DELTA_MAX_FRAC * D / 2.0
+    print(f"Safe diameters: {single_case.sum()} with the single case, {screen['feasible'].sum()} with all cases "
+          f"(largest safe D {D[screen['feasible']].max() if screen['feasible'].any() else float('nan'):.1f} m)")
+    print("Governing load cases:", dict(Counter(screen["governing_case"])))
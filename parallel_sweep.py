@@ -0,0 +1,262 @@
+# === Shared-Memory Parallel Sweep ===
+"""
+Evaluates power and tip deflection over a full (D x V x Omega) grid in a process pool
+without sending results back through pickle.
+
+The parent allocates one multiprocessing.shared_memory block per output, shaped like
+the grid. A task is only (block names, grid axes, start, stop): the worker rebuilds its
+slice of the grid from the axes, attaches to the blocks once per process, writes its
+results in place and returns the number of points done. The parent's arrays are NumPy
+views on the same blocks, so nothing is copied on the way back.
+
+    with parallel_sweep(D, V, omega, workers=4) as sweep:
+        best = sweep.arrays["power"].max()
+
+The arrays are only valid inside the with block (or until sweep.close()); copy what is
+needed afterwards. The deflection checks of all workers are merged into sweep.diagnostics
+(a DeflectionDiagnostics collector), see sweep.diagnostics.summary().
+
+The kernel is chosen by name from KERNELS. "design" gives power and one BVP per point,
+"power" the operating point (tip-speed ratio, Cp, power, torque) from the shared Cp(lambda)
+table of precomputed_tables, and "bem" the same four outputs with the BEM solved at every
+point (about 40 us per point). The benchmark uses "bem" on a grid sized so that every
+worker gets a few seconds of work at the largest worker count, and runs every worker
+count, 1 included, through the same process pool, so the speedups compare like with like.
+The pickling sweep at the largest worker count shows what the shared-memory blocks save.
+
+Usage (from the repository root):
+    python parallel_sweep.py [max_workers]
+
+The "power" kernel needs the tables (python precomputed_tables.py).
+"""
+
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from ODE_group.ODE_code import BLADE_YOUNGS_MODULUS, DeflectionDiagnostics, solve_tip_for_DV
+from Power.power_and_cp_root_finding import Omega_r, Radius, calculate_Cp_array, expected_power_MW_array
+from precomputed_tables import open_tables
+from site_conditions import STANDARD_AIR_DENSITY
+
+
+# PARAMETERS
+OUTPUTS = ("power", "deflection")
+POWER_OUTPUTS = ("tsr", "cp", "power", "torque")
+CHUNK_SIZE = 64             # grid points per task
+BENCHMARK_CHUNK_SIZE = 4096        # grid points per task of the benchmark (about 0.2 s of BEM)
+BENCHMARK_POINTS_PER_WORKER = 65_536  # benchmark grid points per worker at max_workers (a few seconds)
+DIAGNOSTICS_SAMPLE_RATE = 0.1       # fraction of the BVP solves checked against the analytic solution
+
+_attached = {}              # block name -> SharedMemory, per worker process
+
+
+# KERNEL
+def sweep_kernel(D, V, omega, E=BLADE_YOUNGS_MODULUS):
+    """
+    Power (MW, vectorised BEM) and tip deflection (m, one BVP per point) for flat
+    arrays of design points.
+    """
+    return {
+        "power": expected_power_MW_array(D, V, omega_r=omega),
+        "deflection": np.array([solve_tip_for_DV(d, v, w, E) for d, v, w in zip(D, V, omega)]),
+    }
+
+def _operating_point(D, V, omega, lam, cp):
+    power = 0.5 * STANDARD_AIR_DENSITY * math.pi * (D / 2.0)**2 * cp * V**3 / 1_000_000.0
+    return {"tsr": lam, "cp": cp, "power": power, "torque": power / omega}
+
+def power_kernel(D, V, omega, E=BLADE_YOUNGS_MODULUS):
+    """
+    Tip-speed ratio, Cp, power (MW) and rotor torque (MN m) for flat arrays of design
+    points, from the Cp(lambda) table of precomputed_tables (E is not used).
+    """
+    lam = omega * (D / 2.0) / V
+    return _operating_point(D, V, omega, lam, open_tables().cp(lam))
+
+def bem_kernel(D, V, omega, E=BLADE_YOUNGS_MODULUS):
+    """
+    Same outputs as power_kernel with Cp from the vectorised BEM at every point.
+    """
+    lam = omega * (D / 2.0) / V
+    cp = np.clip(calculate_Cp_array(lam, Omega_r, (Omega_r * Radius) / lam), 0.0, 0.593)
+    return _operating_point(D, V, omega, lam, cp)
+
+# kernel name -> (function, outputs)
+KERNELS = {
+    "design": (sweep_kernel, OUTPUTS),
+    "power": (power_kernel, POWER_OUTPUTS),
+    "bem": (bem_kernel, POWER_OUTPUTS),
+}
+
+def _grid_slice(axes, start, stop):
+    i, j, k = np.unravel_index(np.arange(start, stop), tuple(len(a) for a in axes))
+    return axes[0][i], axes[1][j], axes[2][k]
+
+
+# SHARED OUTPUT BLOCKS
+class SharedSweep:
+    """
+    Output arrays of a sweep, each backed by its own shared memory block.
+    """
+
+    def __init__(self, axes, outputs=OUTPUTS):
+        self.axes = tuple(np.asarray(a, dtype=float) for a in axes)
+        self.shape = tuple(len(a) for a in self.axes)
+        self.blocks = {}
+        self.arrays = {}
+        self.diagnostics = DeflectionDiagnostics(severity="collect", sample_rate=DIAGNOSTICS_SAMPLE_RATE)
+        nbytes = max(1, int(np.prod(self.shape)) * np.dtype(float).itemsize)
+        for name in outputs:
+            shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            self.blocks[name] = shm
+            self.arrays[name] = np.ndarray(self.shape, dtype=float, buffer=shm.buf)
+            self.arrays[name][...] = np.nan
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+
+    def block_names(self):
+        return {name: shm.name for name, shm in self.blocks.items()}
+
+    def close(self):
+        self.arrays = {}
+        for shm in self.blocks.values():
+            shm.close()
+            shm.unlink()
+        self.blocks = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _attach(name):
+    if name not in _attached:
+        # pool workers share the parent's resource tracker, which unlinks the block
+        # only if the parent does not (e.g. after a crash)
+        _attached[name] = shared_memory.SharedMemory(name=name)
+    return _attached[name]
+
+def _run_chunk(kernel, block_names, axes, E, start, stop):
+    shape = tuple(len(a) for a in axes)
+    with DeflectionDiagnostics(severity="collect", sample_rate=DIAGNOSTICS_SAMPLE_RATE) as diag:
+        values = KERNELS[kernel][0](*_grid_slice(axes, start, stop), E=E)
+    for name, block in block_names.items():
+        out = np.ndarray(shape, dtype=float, buffer=_attach(block).buf).reshape(-1)
+        out[start:stop] = values[name]
+    return stop - start, diag.report()
+
+
+def parallel_sweep(D, V, omega, workers=None, E=BLADE_YOUNGS_MODULUS, chunk_size=CHUNK_SIZE, kernel="design",
+                   in_process=None):
+    """
+    Evaluate a kernel of KERNELS on the grid D x V x omega. Returns a SharedSweep whose
+    arrays have shape (len(D), len(V), len(omega)); use it as a context manager so that
+    the shared memory is released. By default workers=1 runs in this process, in_process=False
+    uses the process pool whatever the worker count.
+    """
+    kernel_func, outputs = KERNELS[kernel]
+    sweep = SharedSweep((D, V, omega), outputs)
+    bounds = [(s, min(s + chunk_size, sweep.size)) for s in range(0, sweep.size, chunk_size)]
+    try:
+        if (workers == 1) if in_process is None else in_process:
+            with sweep.diagnostics:
+                for start, stop in bounds:
+                    values = kernel_func(*_grid_slice(sweep.axes, start, stop), E=E)
+                    for name, arr in sweep.arrays.items():
+                        arr.reshape(-1)[start:stop] = values[name]
+        else:
+            names = sweep.block_names()
+            done = 0
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_run_chunk, kernel, names, sweep.axes, E, start, stop)
+                           for start, stop in bounds]
+                for fut in futures:
+                    n, report = fut.result()
+                    done += n
+                    sweep.diagnostics.merge(report)
+            if done != sweep.size:
+                raise RuntimeError(f"Sweep incomplete: {done} of {sweep.size} points written")
+    except BaseException:
+        sweep.close()
+        raise
+    return sweep
+
+
+# BENCHMARK
+def _pickled_chunk(kernel, axes, E, start, stop):
+    with DeflectionDiagnostics(severity="collect", sample_rate=DIAGNOSTICS_SAMPLE_RATE):
+        return KERNELS[kernel][0](*_grid_slice(axes, start, stop), E=E)
+
+def pickled_sweep(D, V, omega, workers=None, E=BLADE_YOUNGS_MODULUS, chunk_size=CHUNK_SIZE, kernel="design"):
+    """The naive version for comparison: every task pickles its result arrays back."""
+    outputs = KERNELS[kernel][1]
+    axes = tuple(np.asarray(a, dtype=float) for a in (D, V, omega))
+    shape = tuple(len(a) for a in axes)
+    size = int(np.prod(shape))
+    out = {name: np.empty(size) for name in outputs}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_pickled_chunk, kernel, axes, E, s, min(s + chunk_size, size)): s
+                   for s in range(0, size, chunk_size)}
+        for fut, start in futures.items():
+            values = fut.result()
+            for name in outputs:
+                out[name][start:start + len(values[name])] = values[name]
+    return {name: arr.reshape(shape) for name, arr in out.items()}
+
+def benchmark(D, V, omega, max_workers=None, kernel="bem", chunk_size=BENCHMARK_CHUNK_SIZE):
+    """
+    Wall time of the shared-memory sweep for 1, 2, 4, ... workers up to max_workers
+    (default: CPU count), and of the pickling sweep at max_workers, all through a process
+    pool with the same kernel and chunk size. Returns a list of (label, workers, seconds).
+    """
+    outputs = KERNELS[kernel][1]
+    max_workers = max_workers or os.cpu_count() or 1
+    counts = sorted({min(2**p, max_workers) for p in range(max_workers.bit_length() + 1)})
+    timings = []
+    reference = None
+    for n in counts:
+        t0 = time.perf_counter()
+        with parallel_sweep(D, V, omega, workers=n, chunk_size=chunk_size, kernel=kernel,
+                            in_process=False) as sweep:
+            elapsed = time.perf_counter() - t0
+            if reference is None:
+                reference = {name: arr.copy() for name, arr in sweep.arrays.items()}
+            elif not all(np.array_equal(reference[k], sweep.arrays[k], equal_nan=True) for k in outputs):
+                raise RuntimeError(f"Results with {n} workers differ from the 1-worker run")
+        timings.append(("shared memory", n, elapsed))
+
+    t0 = time.perf_counter()
+    pickled = pickled_sweep(D, V, omega, workers=max_workers, chunk_size=chunk_size, kernel=kernel)
+    timings.append(("pickled results", max_workers, time.perf_counter() - t0))
+    if not all(np.array_equal(reference[k], pickled[k], equal_nan=True) for k in outputs):
+        raise RuntimeError("Pickled results differ from the shared-memory run")
+    return timings
+
+
+# MAIN EXECUTION
+if __name__ == "__main__":
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1
+    # 64 x 32 (V, Omega) points per diameter, enough diameters for the per-worker workload
+    V = np.linspace(4.0, 25.0, 64)
+    omega = np.linspace(0.2, 1.2, 32)
+    D = np.linspace(40.0, 130.0, max_workers * BENCHMARK_POINTS_PER_WORKER // (V.size * omega.size))
+    n_points = D.size * V.size * omega.size
+
+    timings = benchmark(D, V, omega, max_workers)
+    t1 = timings[0][2]
+    print(f"{n_points:,} grid points (D x V x Omega = {D.size} x {V.size} x {omega.size}), "
+          f"{len(POWER_OUTPUTS)} outputs = {n_points * len(POWER_OUTPUTS) * 8 / 1e6:.0f} MB of results")
+    for label, n, seconds in timings:
+        speedup = t1 / seconds
+        print(f"{label:<16} {n:3d} workers: {seconds:7.2f} s | speedup {speedup:5.2f} | "
+              f"efficiency {speedup / n:5.1%}")
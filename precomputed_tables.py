@@ -0,0 +1,210 @@
+# === Shared Precomputed Tables ===
+"""
+Writes the artefacts that every sweep worker would otherwise rebuild for itself to a
+directory of .npy files, once, and opens them read-only with np.load(mmap_mode="r"):
+
+    cp_lambda.npy     (2, n)  tip-speed ratio grid and Cp(lambda) of the BEM reference rotor
+    influence.npy     (4, n)  blade length and the deflection influence coefficients
+                              (c_ar, c_b, c_rl) from deflection_influence_coefficients
+    cost_table.npy    (k, n)  numeric columns of compute_table for the diameter grid
+    manifest.json             lambda_opt, E, column names and array shapes
+
+Workers that open the same directory map the same file pages, so the tables are held
+once in the OS page cache however many workers there are, and a worker is ready as soon
+as the files are mapped (no Newton solve for lambda_opt, no BEM or BVP solves).
+Every file is written to a temporary name and moved into place, and the manifest is
+written last, so a directory with a manifest is always complete.
+
+Usage (from the repository root):
+    python precomputed_tables.py [directory]
+"""
+
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+from ODE_group.ODE_code import AIR_DENSITY, BLADE_YOUNGS_MODULUS, loads_for_DV
+from Power.power_and_cp_root_finding import Omega_r
+from site_conditions import STANDARD_AIR_DENSITY
+
+
+# PARAMETERS
+TABLE_DIR = os.environ.get("TURBINE_TABLES", "precomputed_tables")
+TABLE_VERSION = 1
+DIAMETER_GRID = np.arange(40.0, 130.0 + 1e-9, 0.5)
+LAMBDA_TABLE = np.linspace(0.05, 40.0, 40_000)
+
+_open_tables = {}       # directory -> PrecomputedTables, one per process
+
+
+def _save_atomic(path, array):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        np.save(fh, np.ascontiguousarray(array))
+    os.replace(tmp, path)
+
+def build_tables(directory=TABLE_DIR, diameters=DIAMETER_GRID, E=BLADE_YOUNGS_MODULUS, lambda_grid=LAMBDA_TABLE):
+    """
+    Compute the tables and write them to directory. Returns the manifest.
+    """
+    from ODE_group.ODE_code import deflection_influence_coefficients
+    from Blade_cost_Regression.blade_size_cost import compute_table
+    from Power.power_and_cp_root_finding import Radius, calculate_Cp_array, compute_lambda_optimal
+
+    os.makedirs(directory, exist_ok=True)
+    diameters = np.asarray(diameters, dtype=float)
+
+    V_model = (Omega_r * Radius) / lambda_grid
+    cp = np.clip(calculate_Cp_array(lambda_grid, Omega_r, V_model), 0.0, 0.593)
+    _save_atomic(os.path.join(directory, "cp_lambda.npy"), np.vstack((lambda_grid, cp)))
+
+    L = diameters / 2.0
+    coefs = np.array([deflection_influence_coefficients(l, E) for l in L]).T
+    _save_atomic(os.path.join(directory, "influence.npy"), np.vstack((L, coefs)))
+
+    cost = compute_table(diameters)
+    _save_atomic(os.path.join(directory, "cost_table.npy"), cost.to_numpy(dtype=float).T)
+
+    manifest = {
+        "version": TABLE_VERSION,
+        "lambda_opt": float(compute_lambda_optimal()),
+        "E": float(E),
+        "cost_columns": list(cost.columns),
+        "shapes": {"cp_lambda": [2, lambda_grid.size], "influence": [4, L.size],
+                   "cost_table": [cost.shape[1], cost.shape[0]]},
+    }
+    tmp = os.path.join(directory, f"manifest.json.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=1)
+    os.replace(tmp, os.path.join(directory, "manifest.json"))
+    return manifest
+
+
+class PrecomputedTables:
+    """
+    Read-only memory-mapped view of a table directory written by build_tables.
+    """
+
+    def __init__(self, directory=TABLE_DIR):
+        with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as fh:
+            self.manifest = json.load(fh)
+        if self.manifest["version"] != TABLE_VERSION:
+            raise ValueError(f"{directory}: table version {self.manifest['version']}, expected {TABLE_VERSION}")
+        self.directory = directory
+        self.lambda_opt = self.manifest["lambda_opt"]
+        self.E = self.manifest["E"]
+        self.cp_lambda = np.load(os.path.join(directory, "cp_lambda.npy"), mmap_mode="r")
+        self.influence = np.load(os.path.join(directory, "influence.npy"), mmap_mode="r")
+        self.cost_values = np.load(os.path.join(directory, "cost_table.npy"), mmap_mode="r")
+
+    @property
+    def diameter_range(self):
+        """Smallest and largest diameter (m) of the influence coefficient table."""
+        return 2.0 * float(self.influence[0, 0]), 2.0 * float(self.influence[0, -1])
+
+    def covers(self, diameters):
+        """True if every diameter lies within the influence coefficient table."""
+        D = np.asarray(diameters, dtype=float)
+        D_lo, D_hi = self.diameter_range
+        return bool(np.all((D >= D_lo * (1 - 1e-12)) & (D <= D_hi * (1 + 1e-12))))
+
+    @property
+    def nbytes(self):
+        return self.cp_lambda.nbytes + self.influence.nbytes + self.cost_values.nbytes
+
+    def cp(self, lam):
+        """
+        Cp(lambda) of the reference rotor, interpolated from the table. Cp jumps where a
+        blade element stalls (Cl drops to 0 at 10 degrees), within one grid cell of such a
+        jump the value lies between the two sides. Raises ValueError outside the table.
+        """
+        lam = np.asarray(lam, dtype=float)
+        lo, hi = self.cp_lambda[0, 0], self.cp_lambda[0, -1]
+        if np.any((lam < lo) | (lam > hi)):
+            raise ValueError(f"{self.directory}: tip-speed ratio outside the Cp table [{lo:g}, {hi:g}]")
+        return np.interp(lam, self.cp_lambda[0], self.cp_lambda[1])
+
+    def power_MW(self, D, V_site, omega_r=None, rho=STANDARD_AIR_DENSITY):
+        """expected_power_MW_array from the Cp table."""
+        R = np.asarray(D, dtype=float) / 2.0
+        V_site = np.asarray(V_site, dtype=float)
+        omega_r = Omega_r if omega_r is None else np.asarray(omega_r, dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            lam = (omega_r * R) / V_site
+        valid = (lam >= 1e-6) & np.isfinite(lam)       # no wind or no rotor: no power
+        Cp = np.where(valid, self.cp(np.where(valid, lam, self.cp_lambda[0, 0])), 0.0)
+        return 0.5 * rho * math.pi * R**2 * Cp * V_site**3 / 1_000_000.0
+
+    def influence_coefficients(self, L):
+        """
+        (c_ar, c_b, c_rl) for blade lengths L. The coefficients are power laws in L
+        (L^6 and L^4), so interpolating in log-log space is exact between grid points.
+        Raises ValueError for lengths outside the table, which np.interp would clamp.
+        """
+        L = np.asarray(L, dtype=float)
+        if not self.covers(2.0 * L):
+            D_lo, D_hi = self.diameter_range
+            raise ValueError(f"{self.directory}: diameters outside the table [{D_lo:g}, {D_hi:g}] m, "
+                             f"rebuild it with build_tables(diameters=...)")
+        logL = np.log(L)
+        grid = np.log(self.influence[0])
+        return tuple(np.exp(np.interp(logL, grid, np.log(self.influence[k]))) for k in (1, 2, 3))
+
+    def tip_deflection(self, D, V, omega, rho=AIR_DENSITY):
+        """solve_tip_for_DV_batch from the influence coefficient table (E as in the manifest)."""
+        c_ar, c_b, c_rl = self.influence_coefficients(np.asarray(D, dtype=float) / 2.0)
+        a_r, b_const, rl_const = loads_for_DV(np.asarray(V, dtype=float), np.asarray(omega, dtype=float), rho)
+        return np.hypot(a_r * c_ar + b_const * c_b, rl_const * c_rl)
+
+    def worstcase_tip_deflection(self, D, V_max):
+        """Tip deflection with the rotor at lambda_opt, as in Final_optimal_diameter."""
+        D = np.asarray(D, dtype=float)
+        return self.tip_deflection(D, V_max, self.lambda_opt * V_max / (D / 2.0))
+
+    def cost_table(self):
+        """compute_table for the stored diameter grid, as a DataFrame on the mapped memory."""
+        import pandas as pd
+        return pd.DataFrame(self.cost_values.T, columns=self.manifest["cost_columns"], copy=False)
+
+
+def open_tables(directory=TABLE_DIR):
+    """
+    The tables of directory, mapped once per process. Meant to be called from a
+    worker initialiser or at the top of a worker function.
+    """
+    directory = os.path.abspath(directory)
+    if directory not in _open_tables:
+        _open_tables[directory] = PrecomputedTables(directory)
+    return _open_tables[directory]
+
+
+# MAIN EXECUTION
+if __name__ == "__main__":
+    from ODE_group.ODE_code import WIND_VELOCITIES, DeflectionDiagnostics, solve_tip_for_DV
+    from Power.power_and_cp_root_finding import expected_power_MW_array
+
+    directory = sys.argv[1] if len(sys.argv) > 1 else TABLE_DIR
+
+    t0 = time.perf_counter()
+    build_tables(directory)
+    print(f"Built tables in '{directory}' in {time.perf_counter() - t0:.1f} s")
+
+    t0 = time.perf_counter()
+    tables = PrecomputedTables(directory)
+    print(f"Mapped {tables.nbytes / 1024:.0f} kB of tables in {1000 * (time.perf_counter() - t0):.2f} ms")
+
+    D = np.arange(40.0, 130.0 + 1e-9, 0.25)
+    power_err = np.abs(tables.power_MW(D, 6.0) - expected_power_MW_array(D, 6.0))
+    V_max = max(WIND_VELOCITIES.values())
+    y_table = tables.worstcase_tip_deflection(D[::20], V_max)
+    with DeflectionDiagnostics(severity="collect") as diagnostics:
+        y_bvp = np.array([solve_tip_for_DV(d, V_max, tables.lambda_opt * V_max / (d / 2.0)) for d in D[::20]])
+    print(f"Power error median {np.median(power_err):.1e} MW, {np.sum(power_err > 1e-4)} of {D.size} "
+          f"diameters next to a stall jump above 1e-4 MW; max relative deflection error "
+          f"{np.max(np.abs(y_table - y_bvp) / y_bvp):.2e}")
+    print(diagnostics.summary())
+    print(tables.cost_table().head())
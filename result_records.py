@@ -0,0 +1,90 @@
+# === Array-Backed Result Records ===
+"""
+Columnar result container shared by the cost, deflection and optimiser modules.
+
+All numeric fields live in one preallocated (n_fields, n) float64 block and the flags in
+a bool array, instead of one dict or tuple per design point. A point costs ~110 bytes
+rather than the ~1-2 kB of an 8-key dict, and to_dataframe() hands the block to pandas
+without copying it.
+"""
+
+import numpy as np
+
+
+# Order matters: fields that are usually exported together are kept next to each other,
+# so that they form a contiguous slice of the block and can be viewed without a copy.
+FIELDS = (
+    "D",                            # rotor diameter (m)
+    "L",                            # blade length (m)
+    "volume",                       # blade volume (m^3)
+    "carbon_fraction",
+    "material_cost_per_m3",         # £/m^3
+    "material_structural_cost",     # £ per blade
+    "tooling_per_blade",            # £ per blade
+    "blade_cost",                   # £ per blade
+    "turbine_cost",                 # £ for all blades of one turbine
+    "V",                            # wind speed of the evaluation (m/s)
+    "power",                        # MW
+    "deflection",                   # tip deflection (m)
+    "score",                        # MW per £
+)
+FLAGS = ("safe",)
+
+# column names used by blade_costs.csv
+COST_TABLE_COLUMNS = {
+    "D": "Diameter_m",
+    "L": "BladeLength_m",
+    "volume": "Volume_m3",
+    "carbon_fraction": "CarbonFraction",
+    "material_cost_per_m3": "MaterialCostPer_m3_£",
+    "material_structural_cost": "MaterialStructuralCost_£",
+    "tooling_per_blade": "ToolingAmortPerBlade_£",
+    "blade_cost": "TotalCost_£",
+}
+
+
+class ResultTable:
+    """
+    Preallocated columns for n design points. Unset numeric values are NaN.
+    table["power"] returns a writable view of that column.
+    """
+
+    def __init__(self, n):
+        self.values = np.full((len(FIELDS), n), np.nan)
+        self.flags = np.zeros((len(FLAGS), n), dtype=bool)
+
+    def __len__(self):
+        return self.values.shape[1]
+
+    def __getitem__(self, name):
+        if name in FLAGS:
+            return self.flags[FLAGS.index(name)]
+        return self.values[FIELDS.index(name)]
+
+    def __setitem__(self, name, value):
+        self[name][:] = value
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.flags.nbytes
+
+    def to_dataframe(self, fields=None, names=None, flags=True):
+        """
+        pandas DataFrame of the chosen fields (all by default). When the fields are a
+        contiguous run of FIELDS the frame is a view on the table's memory (zero-copy).
+        names optionally maps field names to column names.
+        """
+        import pandas as pd
+
+        fields = list(FIELDS if fields is None else fields)
+        idx = [FIELDS.index(f) for f in fields]
+        if idx == list(range(idx[0], idx[-1] + 1)):
+            block = self.values[idx[0]:idx[-1] + 1]         # view
+        else:
+            block = self.values[idx]                        # fancy indexing copies
+        names = names or {}
+        df = pd.DataFrame(block.T, columns=[names.get(f, f) for f in fields], copy=False)
+        if flags:
+            for name in FLAGS:
+                df[names.get(name, name)] = self[name]
+        return df
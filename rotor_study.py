@@ -0,0 +1,122 @@
+# === Blade Count and Chord/Twist Scaling Study ===
+"""
+Compares rotor configurations (blade count B, chord and twist scale factors on the 20.5 m
+reference blade) on the same footing as the diameter optimiser:
+
+    power : fixed 10 rpm rotor at the site wind speed, Cp from the BEM model
+    cost  : B blades from the cost model, laminate volume scaled with the chord and the
+            tooling amortised over B blades per turbine of the production run
+
+All configurations are solved in ONE call of calculate_Cp_array: the configurations form
+the rows and the tip-speed ratios (a lambda grid for the Cp curve, plus the lambda of
+every diameter in the study) the columns, so the reference geometry is shared and the
+BEM iteration runs once over the whole (configuration x lambda) block. Adding
+configurations only widens the arrays, the Python-level work stays the same. The optimal
+tip-speed ratio of every configuration comes from one batched optimise_lambda call.
+
+The structural screen (safe diameters) uses the reference blade section and is shared by
+all configurations.
+
+Usage (from the repository root):
+    python rotor_study.py
+"""
+
+import math
+import time
+
+import numpy as np
+
+from Blade_cost_Regression.blade_size_cost import blade_cost_arrays, production_volume_turbines
+from Power.power_and_cp_root_finding import Omega_r, Radius, calculate_Cp_array, optimise_lambda
+from site_conditions import STANDARD_AIR_DENSITY
+
+
+# PARAMETERS
+BLADE_COUNTS = (2, 3, 4)
+CHORD_SCALES = (0.75, 1.0, 1.25)
+TWIST_SCALES = (0.8, 1.0, 1.2)
+LAMBDA_GRID = np.linspace(0.5, 20.0, 400)
+
+
+def rotor_configurations(blade_counts=BLADE_COUNTS, chord_scales=CHORD_SCALES, twist_scales=TWIST_SCALES):
+    """
+    Every combination of blade count, chord scale and twist scale, as a dict of 1-D arrays.
+    """
+    B, chord, twist = np.meshgrid(blade_counts, chord_scales, twist_scales, indexing="ij")
+    return {"B": B.ravel().astype(float), "chord_scale": chord.ravel(), "twist_scale": twist.ravel()}
+
+
+def run_rotor_study(diameters, V_power=6.0, configs=None, lambda_grid=LAMBDA_GRID, **cost_kwargs):
+    """
+    Power, rotor cost and score of every configuration at every diameter.
+    cost_kwargs (c_glass, c_carbon) are passed on to the cost model.
+    Returns a dict of arrays indexed [configuration] or [configuration, diameter].
+    """
+    configs = rotor_configurations() if configs is None else configs
+    diameters = np.asarray(diameters, dtype=float)
+    B = configs["B"][:, None]
+    chord_scale = configs["chord_scale"][:, None]
+    twist_scale = configs["twist_scale"][:, None]
+
+    # one batched BEM solve: columns are the Cp-curve grid followed by the diameters' lambdas
+    lam_D = Omega_r * (diameters / 2.0) / V_power
+    lam = np.concatenate((lambda_grid, lam_D))
+    V_model = (Omega_r * Radius) / lam
+    cp = np.clip(calculate_Cp_array(lam, Omega_r, V_model, B_num=B, chord_scale=chord_scale,
+                                    twist_scale=twist_scale), 0.0, 0.593)
+    cp_curves, cp_D = cp[:, :lambda_grid.size], cp[:, lambda_grid.size:]
+
+    optimum = optimise_lambda(B_num=configs["B"], chord_scale=configs["chord_scale"],
+                              twist_scale=configs["twist_scale"])
+    lambda_opt, cp_max = optimum["lambda_opt"], optimum["cp"]
+    n_config = B.shape[0]
+
+    power = 0.5 * STANDARD_AIR_DENSITY * math.pi * (diameters / 2.0)**2 * cp_D * V_power**3 / 1_000_000.0
+
+    cost = np.empty((n_config, diameters.size))
+    for k in range(n_config):
+        n_blades = int(configs["B"][k])
+        table = blade_cost_arrays(diameters / 2.0, production_blades=production_volume_turbines * n_blades,
+                                  num_blades=n_blades, chord_scale=configs["chord_scale"][k], **cost_kwargs)
+        cost[k] = table["turbine_cost"]
+
+    score = power / cost
+    best = np.argmax(score, axis=1)
+    rows = np.arange(n_config)
+    return {
+        **configs,
+        "diameters": diameters,
+        "lambda_grid": lambda_grid,
+        "cp_curves": cp_curves,
+        "lambda_opt": lambda_opt,
+        "cp_max": cp_max,
+        "power_MW": power,
+        "cost_GBP": cost,
+        "score": score,
+        "D_opt_m": diameters[best],
+        "best_power_MW": power[rows, best],
+        "best_cost_GBP": cost[rows, best],
+        "best_score": score[rows, best],
+    }
+
+
+# MAIN EXECUTION
+if __name__ == "__main__":
+    from ODE_group.ODE_code import DeflectionDiagnostics
+    from Final_optimal_diameter import get_safe_diameters
+
+    diagnostics = DeflectionDiagnostics(severity="collect")
+    safe_D = get_safe_diameters(diagnostics=diagnostics)
+    print(diagnostics.summary())
+    t0 = time.perf_counter()
+    study = run_rotor_study(safe_D)
+    elapsed = time.perf_counter() - t0
+    n_config = study["B"].size
+    print(f"{n_config} configurations x {safe_D.size} diameters in {elapsed:.2f} s")
+
+    print(f"{'B':>2} {'chord':>6} {'twist':>6} {'lam_opt':>8} {'Cp_max':>7} {'D_opt':>6} {'P (MW)':>7} "
+          f"{'cost (£)':>10} {'MW/£':>10}")
+    for k in np.argsort(study["best_score"])[::-1]:
+        print(f"{study['B'][k]:2.0f} {study['chord_scale'][k]:6.2f} {study['twist_scale'][k]:6.2f} "
+              f"{study['lambda_opt'][k]:8.3f} {study['cp_max'][k]:7.4f} {study['D_opt_m'][k]:6.1f} "
+              f"{study['best_power_MW'][k]:7.3f} {study['best_cost_GBP'][k]:10,.0f} {study['best_score'][k]:10.3e}")
@@ -0,0 +1,95 @@
+# === Site Atmospheric Conditions ===
+"""
+Single source of truth for the air properties used by the aerodynamic (BEM/power) and
+load (ODE) models, and helpers to turn site temperature / altitude / pressure into
+batched arrays of atmospheric states.
+
+All functions broadcast over NumPy arrays, so a whole year of hourly states can be
+passed to expected_power_MW_array or loads_for_DV in one call.
+
+Usage (from the repository root):
+    python site_conditions.py
+"""
+
+import numpy as np
+
+
+# PARAMETERS (ISA sea level)
+STANDARD_AIR_DENSITY = 1.225        # kg/m^3
+STANDARD_TEMPERATURE = 288.15       # K
+STANDARD_PRESSURE = 101_325.0       # Pa
+STANDARD_VISCOSITY = 1.789e-5       # dynamic viscosity of air, Pa s
+GAS_CONSTANT_AIR = 287.05           # J/(kg K)
+LAPSE_RATE = 0.0065                 # K/m, troposphere
+GRAVITY = 9.81
+SUTHERLAND_T0 = 273.15              # K
+SUTHERLAND_MU0 = 1.716e-5           # Pa s at SUTHERLAND_T0
+SUTHERLAND_S = 110.4                # K
+
+WHITELEE_ALTITUDE = 300.0           # m, Eaglesham Moor
+
+
+def pressure_at_altitude(altitude_m, sea_level_pressure=STANDARD_PRESSURE):
+    """Barometric formula for the standard troposphere."""
+    altitude_m = np.asarray(altitude_m, dtype=float)
+    exponent = GRAVITY / (GAS_CONSTANT_AIR * LAPSE_RATE)
+    return sea_level_pressure * (1.0 - LAPSE_RATE * altitude_m / STANDARD_TEMPERATURE) ** exponent
+
+def air_density(temperature_K, pressure_Pa=STANDARD_PRESSURE):
+    """Ideal-gas density of dry air."""
+    return np.asarray(pressure_Pa, dtype=float) / (GAS_CONSTANT_AIR * np.asarray(temperature_K, dtype=float))
+
+def dynamic_viscosity(temperature_K):
+    """Sutherland's law for the dynamic viscosity of air."""
+    T = np.asarray(temperature_K, dtype=float)
+    return SUTHERLAND_MU0 * (T / SUTHERLAND_T0) ** 1.5 * (SUTHERLAND_T0 + SUTHERLAND_S) / (T + SUTHERLAND_S)
+
+def site_conditions(temperature_K=STANDARD_TEMPERATURE, altitude_m=0.0, pressure_Pa=None):
+    """
+    Batched atmospheric states as a dict of broadcast arrays:
+    temperature_K, pressure_Pa, density (kg/m^3) and viscosity (Pa s).
+    If pressure_Pa is not given it is taken from the standard atmosphere at altitude_m.
+    """
+    if pressure_Pa is None:
+        pressure_Pa = pressure_at_altitude(altitude_m)
+    T, p = np.broadcast_arrays(np.asarray(temperature_K, dtype=float), np.asarray(pressure_Pa, dtype=float))
+    return {
+        "temperature_K": T,
+        "pressure_Pa": p,
+        "density": air_density(T, p),
+        "viscosity": dynamic_viscosity(T),
+    }
+
+def annual_temperature_cycle(hours=None, mean_C=8.5, seasonal_amplitude_C=6.0, daily_amplitude_C=3.0):
+    """
+    Simple hourly temperature model (K): a seasonal cosine peaking in late July plus a
+    daily cycle peaking mid-afternoon. Defaults are typical for central Scotland.
+    """
+    if hours is None:
+        hours = np.arange(8760)
+    hours = np.asarray(hours, dtype=float)
+    seasonal = seasonal_amplitude_C * np.cos(2 * np.pi * (hours / 8760.0 - 205.0 / 365.0))
+    daily = daily_amplitude_C * np.cos(2 * np.pi * ((hours % 24) - 15.0) / 24.0)
+    return 273.15 + mean_C + seasonal + daily
+
+
+# MAIN EXECUTION
+if __name__ == "__main__":
+    from ODE_group.ODE_code import WIND_VELOCITIES, solve_tip_for_DV_batch
+    from Power.power_and_cp_root_finding import expected_power_MW_array
+    from Final_optimal_diameter import LAMBDA_OPT
+
+    year = site_conditions(annual_temperature_cycle(), altitude_m=WHITELEE_ALTITUDE)
+    rho = year["density"]
+    print(f"Air density over the year: {rho.min():.3f} - {rho.max():.3f} kg/m^3 "
+          f"(standard {STANDARD_AIR_DENSITY})")
+
+    D, V = 90.5, 6.0
+    power = expected_power_MW_array(D, V, rho=rho, viscosity=year["viscosity"])
+    print(f"Power at {V} m/s: {power.min():.3f} - {power.max():.3f} MW, "
+          f"standard air {float(expected_power_MW_array(D, V)):.3f} MW")
+
+    V_max = max(WIND_VELOCITIES.values())
+    omega = LAMBDA_OPT * V_max / (D / 2.0)
+    deflection = solve_tip_for_DV_batch(D, V_max, omega, rho=rho)
+    print(f"Worst-case tip deflection: {deflection.min():.3f} - {deflection.max():.3f} m")
@@ -0,0 +1,226 @@
+# === Reproducible, Resumable Study Runner ===
+"""
+Runs long Monte Carlo / design-space studies in deterministic chunks that are
+checkpointed to disk, so an interrupted run resumes where it stopped.
+
+    samples  : chunk k draws its inputs from its own numpy Generator, spawned as child k
+               of SeedSequence(seed). The inputs of a chunk therefore only depend on
+               (seed, chunk_size, k), not on which chunks ran before or in which process.
+    checkpoint: every finished chunk is written to chunk_<k>.npz through a temporary file
+               and os.replace, so a chunk file is either complete or absent. manifest.json
+               records the study settings and a resume with different settings is refused.
+    result   : the chunks are concatenated in chunk order, so a resumed run gives results
+               bit-identical to an uninterrupted one (and to a run with other worker counts).
+
+Studies are registered in STUDIES as (sample, evaluate) functions:
+    sample(rng, n)     -> dict of input arrays of length n
+    evaluate(samples)  -> dict of output arrays of length n
+
+Usage (from the repository root):
+    python study_runner.py checkpoints/mc --samples 5000 --seed 1 --workers 4
+    python study_runner.py checkpoints/mc --samples 5000 --seed 1 --max-chunks 3   # stop early
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from ODE_group.ODE_code import BLADE_YOUNGS_MODULUS, WIND_VELOCITIES, deflection_influence_coefficients, loads_for_DV
+from Blade_cost_Regression.blade_size_cost import C_carbon, C_glass, blade_cost_arrays
+from Power.power_and_cp_root_finding import expected_power_MW_array
+from Final_optimal_diameter import D_CAP, DELTA_MAX_FRAC, LAMBDA_OPT
+
+
+# PARAMETERS
+CHUNK_SIZE = 250
+DIAMETERS = np.arange(40.0, 130.0 + 1e-9, 0.5)
+V_MAX = max(WIND_VELOCITIES.values())
+
+_coefficients = None        # influence coefficients at BLADE_YOUNGS_MODULUS, per process
+
+
+# DESIGN UNCERTAINTY STUDY
+def sample_design_uncertainty(rng, n):
+    """Material prices, stiffness and site winds around the baseline values."""
+    return {
+        "c_carbon": C_carbon * rng.lognormal(0.0, 0.2, n),
+        "c_glass": C_glass * rng.lognormal(0.0, 0.15, n),
+        "E": BLADE_YOUNGS_MODULUS * rng.normal(1.0, 0.05, n),
+        "V_power": rng.normal(6.0, 0.5, n),
+        "V_max": rng.gumbel(V_MAX, 1.5, n),
+    }
+
+def _reference_coefficients():
+    global _coefficients
+    if _coefficients is None:
+        _coefficients = np.array([deflection_influence_coefficients(D / 2.0) for D in DIAMETERS]).T
+    return _coefficients
+
+def evaluate_design_uncertainty(samples):
+    """
+    Optimal diameter of every sample, as optimise_over_safe_diameters on DIAMETERS.
+    The influence coefficients scale with 1/E, so the BVPs are solved once per process.
+    """
+    L = DIAMETERS / 2.0
+    E_ratio = (BLADE_YOUNGS_MODULUS / samples["E"])[:, None]
+    c_ar, c_b, c_rl = (c[None, :] * E_ratio for c in _reference_coefficients())
+    V_max = samples["V_max"][:, None]
+    a_r, b_const, rl_const = loads_for_DV(V_max, LAMBDA_OPT * V_max / L[None, :])
+    deflection = np.hypot(a_r * c_ar + b_const * c_b, rl_const * c_rl)
+    safe = (deflection <= DELTA_MAX_FRAC * L[None, :]) & (DIAMETERS[None, :] <= D_CAP)
+
+    power = expected_power_MW_array(DIAMETERS[None, :], samples["V_power"][:, None])
+    cost = np.array([blade_cost_arrays(L, c_glass=g, c_carbon=c)["turbine_cost"]
+                     for g, c in zip(samples["c_glass"], samples["c_carbon"])])
+    score = np.where(safe, power / cost, -np.inf)
+
+    best = np.argmax(score, axis=1)
+    rows = np.arange(best.size)
+    any_safe = safe.any(axis=1)
+    return {
+        "n_safe": safe.sum(axis=1),
+        "D_opt_m": np.where(any_safe, DIAMETERS[best], np.nan),
+        "power_MW": np.where(any_safe, power[rows, best], np.nan),
+        "cost_GBP": np.where(any_safe, cost[rows, best], np.nan),
+        "score": np.where(any_safe, score[rows, best], np.nan),
+    }
+
+# study name -> (sample, evaluate)
+STUDIES = {
+    "design_uncertainty": (sample_design_uncertainty, evaluate_design_uncertainty),
+}
+
+
+# CHUNKS
+def _chunk_rng(seed, n_chunks, k):
+    return np.random.default_rng(np.random.SeedSequence(seed).spawn(n_chunks)[k])
+
+def run_chunk(study, seed, n_samples, chunk_size, k):
+    """Inputs and outputs of chunk k; deterministic in its arguments."""
+    sample, evaluate = STUDIES[study]
+    n_chunks = -(-n_samples // chunk_size)
+    n = min(chunk_size, n_samples - k * chunk_size)
+    samples = sample(_chunk_rng(seed, n_chunks, k), n)
+    outputs = evaluate(samples)
+    overlap = set(samples) & set(outputs)
+    if overlap:
+        raise ValueError(f"Study {study!r}: outputs {sorted(overlap)} shadow inputs")
+    return {**samples, **outputs}
+
+def _write_atomic(path, write):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        write(fh)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+class StudyRunner:
+    """
+    Chunked, checkpointed execution of one study in checkpoint_dir.
+    """
+
+    def __init__(self, checkpoint_dir, study="design_uncertainty", n_samples=5000, seed=0, chunk_size=CHUNK_SIZE):
+        if study not in STUDIES:
+            raise KeyError(f"Unknown study {study!r}, available: {sorted(STUDIES)}")
+        self.checkpoint_dir = checkpoint_dir
+        self.config = {"study": study, "n_samples": int(n_samples), "seed": int(seed), "chunk_size": int(chunk_size)}
+        self.n_chunks = -(-self.config["n_samples"] // self.config["chunk_size"])
+        os.makedirs(checkpoint_dir, exist_ok=True)
+
+        manifest = os.path.join(checkpoint_dir, "manifest.json")
+        if os.path.exists(manifest):
+            with open(manifest, encoding="utf-8") as fh:
+                saved = json.load(fh)
+            if saved != self.config:
+                raise ValueError(f"{checkpoint_dir} holds a different study {saved}, refusing to resume with {self.config}")
+        else:
+            _write_atomic(manifest, lambda fh: fh.write(json.dumps(self.config, indent=1).encode("utf-8")))
+
+    def chunk_path(self, k):
+        return os.path.join(self.checkpoint_dir, f"chunk_{k:05d}.npz")
+
+    def completed_chunks(self):
+        return [k for k in range(self.n_chunks) if os.path.exists(self.chunk_path(k))]
+
+    def _save_chunk(self, k, arrays):
+        _write_atomic(self.chunk_path(k), lambda fh: np.savez(fh, **arrays))
+
+    def run(self, workers=1, max_chunks=None, verbose=True):
+        """
+        Run the chunks that have no checkpoint yet (at most max_chunks of them).
+        Returns the full results once every chunk is done, otherwise None.
+        """
+        todo = [k for k in range(self.n_chunks) if not os.path.exists(self.chunk_path(k))]
+        if max_chunks is not None:
+            todo = todo[:max_chunks]
+        done = len(self.completed_chunks())
+        if verbose and done:
+            print(f"Resuming: {done}/{self.n_chunks} chunks already checkpointed", file=sys.stderr)
+
+        args = (self.config["study"], self.config["seed"], self.config["n_samples"], self.config["chunk_size"])
+        t0 = time.perf_counter()
+        if workers == 1:
+            for i, k in enumerate(todo, 1):
+                self._save_chunk(k, run_chunk(*args, k))
+                if verbose:
+                    self._report(i, len(todo), t0)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(run_chunk, *args, k): k for k in todo}
+                for i, fut in enumerate(as_completed(futures), 1):
+                    self._save_chunk(futures[fut], fut.result())
+                    if verbose:
+                        self._report(i, len(todo), t0)
+        if verbose and todo:
+            print(file=sys.stderr)
+        return self.results() if len(self.completed_chunks()) == self.n_chunks else None
+
+    def _report(self, i, total, t0):
+        elapsed = time.perf_counter() - t0
+        print(f"\rchunks: {i}/{total} this run ({elapsed:.1f} s)", end="", file=sys.stderr, flush=True)
+
+    def results(self):
+        """All checkpointed chunks concatenated in chunk order."""
+        parts = []
+        for k in range(self.n_chunks):
+            with np.load(self.chunk_path(k)) as data:
+                parts.append({name: data[name] for name in data.files})
+        return {name: np.concatenate([p[name] for p in parts]) for name in parts[0]}
+
+
+# MAIN EXECUTION
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a chunked, resumable design study.")
+    parser.add_argument("checkpoint_dir", help="directory for the manifest, chunk checkpoints and results")
+    parser.add_argument("--study", default="design_uncertainty", choices=sorted(STUDIES))
+    parser.add_argument("--samples", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("-w", "--workers", type=int, default=1)
+    parser.add_argument("--max-chunks", type=int, default=None, help="stop after this many new chunks")
+    args = parser.parse_args(argv)
+
+    runner = StudyRunner(args.checkpoint_dir, args.study, args.samples, args.seed, args.chunk_size)
+    results = runner.run(workers=args.workers, max_chunks=args.max_chunks)
+    if results is None:
+        print(f"{len(runner.completed_chunks())}/{runner.n_chunks} chunks done, run again to resume", file=sys.stderr)
+        return
+
+    path = os.path.join(args.checkpoint_dir, "results.npz")
+    _write_atomic(path, lambda fh: np.savez(fh, **results))
+    print(f"Saved '{path}'", file=sys.stderr)
+    if "D_opt_m" in results:
+        D_opt = results["D_opt_m"]
+        print(f"D_opt over {D_opt.size} samples: median {np.nanmedian(D_opt):.1f} m, "
+              f"5-95% {np.nanpercentile(D_opt, 5):.1f} - {np.nanpercentile(D_opt, 95):.1f} m")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+# === Surrogate Model for the Design Pipeline ===
+"""
+Gaussian-process surrogate for (D, Omega, V, E, C_carbon) -> (power, cost, deflection).
+
+The truth models are the existing ones:
+    power      : expected_power_MW(D, V, omega_r=Omega)
+    cost       : blade_cost_gbp(D, c_carbon=C_carbon)   (deterministic_blade_cost x 3 blades)
+    deflection : solve_tip_for_DV(D, V, Omega, E)
+
+Training points are added by active learning: from a pool of random candidates the point
+with the largest predicted relative uncertainty is evaluated with the truth models and
+added to the training set. Predictions come with error bars, and evaluate() falls back to
+the truth models for any point whose predicted relative error is above a tolerance.
+
+Power is zero over a large part of the (Omega, V) range (Cp is clipped at 0), so it is
+modelled as the power coefficient P / P_wind, and its error is measured in Cp units
+(an error of 0.01 in Cp counts as 1 % whatever the power is). The tip-speed ratio
+lambda = Omega * D / (2 V) is given to the GP as an extra input feature, since Cp is a
+function of lambda only.
+
+Usage (from the repository root):
+    python surrogate_model.py
+"""
+
+import math
+import time
+import warnings
+
+import numpy as np
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.gaussian_process import GaussianProcessRegressor
+from sklearn.gaussian_process.kernels import ConstantKernel, RBF, WhiteKernel
+
+from ODE_group.ODE_code import DeflectionDiagnostics, solve_tip_for_DV
+from Power.power_and_cp_root_finding import expected_power_MW
+from Final_optimal_diameter import blade_cost_gbp
+from site_conditions import STANDARD_AIR_DENSITY
+
+
+# PARAMETERS
+INPUTS = ["D", "omega", "V", "E", "c_carbon"]
+OUTPUTS = ["power_MW", "cost_GBP", "deflection_m"]
+LOG_OUTPUTS = {"cost_GBP", "deflection_m"}      # strictly positive, modelled in log space
+RHO_AIR = STANDARD_AIR_DENSITY
+
+DEFAULT_BOUNDS = {
+    "D": (40.0, 130.0),             # m
+    "omega": (0.5, 2.0),            # rad/s
+    "V": (3.0, 25.0),               # m/s
+    "E": (35e9, 55e9),              # Pa
+    "c_carbon": (8_000.0, 20_000.0),  # £/m^3
+}
+
+
+def wind_power_MW(X):
+    """Power in the wind over the rotor disc, used to turn power into a power coefficient."""
+    X = np.atleast_2d(X)
+    return 0.5 * RHO_AIR * math.pi * (X[:, 0] / 2.0)**2 * X[:, 2]**3 / 1_000_000.0
+
+
+def tip_speed_ratio(X):
+    X = np.atleast_2d(X)
+    return X[:, 1] * X[:, 0] / (2.0 * X[:, 2])
+
+
+def truth_models(x):
+    """
+    Evaluate the truth models for one design point x = (D, omega, V, E, c_carbon).
+    """
+    D, omega, V, E, c_carbon = x
+    return np.array([
+        float(expected_power_MW(D, V, omega_r=omega)),
+        float(blade_cost_gbp(D, c_carbon=c_carbon)),
+        solve_tip_for_DV(D, V, omega, E),
+    ])
+
+
+class DesignSurrogate:
+
+    def __init__(self, bounds=None, seed=0):
+        self.bounds = dict(DEFAULT_BOUNDS, **(bounds or {}))
+        self.lower = np.array([self.bounds[k][0] for k in INPUTS])
+        self.upper = np.array([self.bounds[k][1] for k in INPUTS])
+        (D_lo, D_hi), (om_lo, om_hi), (V_lo, V_hi) = self.bounds["D"], self.bounds["omega"], self.bounds["V"]
+        self.lambda_range = (np.log(om_lo * D_lo / (2.0 * V_hi)), np.log(om_hi * D_hi / (2.0 * V_lo)))
+        self.rng = np.random.default_rng(seed)
+        self.X = np.empty((0, len(INPUTS)))
+        self.Y = np.empty((0, len(OUTPUTS)))
+        self.models = []
+        self.truth_evaluations = 0
+        self.diagnostics = DeflectionDiagnostics(severity="collect")   # checks of the truth deflections
+
+    # scaling
+    def _to_unit(self, X):
+        X = np.atleast_2d(X)
+        lo, hi = self.lambda_range
+        lam_unit = (np.log(tip_speed_ratio(X)) - lo) / (hi - lo)
+        return np.column_stack(((X - self.lower) / (self.upper - self.lower), lam_unit))
+
+    def _transform(self, X, Y):
+        Y = np.array(Y, dtype=float)
+        Y[:, 0] = Y[:, 0] / wind_power_MW(X)
+        for j, name in enumerate(OUTPUTS):
+            if name in LOG_OUTPUTS:
+                Y[:, j] = np.log(Y[:, j])
+        return Y
+
+    def _sample(self, n):
+        # Latin hypercube in the unit cube
+        u = (self.rng.permuted(np.tile(np.arange(n), (len(INPUTS), 1)), axis=1).T
+             + self.rng.random((n, len(INPUTS)))) / n
+        return self.lower + u * (self.upper - self.lower)
+
+    # training
+    def add_points(self, X):
+        X = np.atleast_2d(X)
+        with self.diagnostics:
+            Y = np.array([truth_models(x) for x in X])
+        self.truth_evaluations += len(X)
+        self.X = np.vstack((self.X, X))
+        self.Y = np.vstack((self.Y, Y))
+
+    def fit(self):
+        U = self._to_unit(self.X)
+        T = self._transform(self.X, self.Y)
+        self.models = []
+        for j in range(len(OUTPUTS)):
+            kernel = (ConstantKernel(1.0, (1e-3, 1e3))
+                      * RBF(np.ones(len(INPUTS) + 1), (1e-2, 1e2))
+                      + WhiteKernel(1e-6, (1e-10, 1e-2)))
+            gp = GaussianProcessRegressor(kernel, normalize_y=True, n_restarts_optimizer=2,
+                                          random_state=int(self.rng.integers(2**31)))
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", ConvergenceWarning)
+                gp.fit(U, T[:, j])
+            self.models.append(gp)
+
+    def train(self, n_initial=40, n_active=60, n_candidates=2000, refit_every=5, verbose=True):
+        """
+        Initial Latin hypercube design followed by active learning at the candidates
+        with the largest predicted relative error.
+        """
+        self.add_points(self._sample(n_initial))
+        self.fit()
+        added = 0
+        while added < n_active:
+            candidates = self._sample(n_candidates)
+            rel_err = self.relative_error(candidates).max(axis=1)
+            n_new = min(refit_every, n_active - added)
+            picks = np.argsort(rel_err)[::-1][:n_new]
+            self.add_points(candidates[picks])
+            self.fit()
+            added += n_new
+            if verbose:
+                print(f"{len(self.X)} training points, worst candidate relative error {rel_err.max():.3f}")
+
+    # prediction
+    def predict(self, X):
+        """
+        Mean and standard deviation of every output, as dicts of arrays.
+        Log-modelled outputs are returned on their natural scale (std is first-order).
+        """
+        mean, std = self._predict_transformed(X)
+        P_wind = wind_power_MW(X)
+        mean["power_MW"] = np.clip(mean["power_MW"], 0.0, 0.593) * P_wind     # Cp within [0, Betz]
+        std["power_MW"] = std["power_MW"] * P_wind
+        for name in LOG_OUTPUTS:
+            mean[name] = np.exp(mean[name])
+            std[name] = mean[name] * std[name]
+        return mean, std
+
+    def _predict_transformed(self, X):
+        U = self._to_unit(X)
+        mean, std = {}, {}
+        for name, gp in zip(OUTPUTS, self.models):
+            mean[name], std[name] = gp.predict(U, return_std=True)
+        return mean, std
+
+    def relative_error(self, X):
+        """
+        Predicted relative error per point and output, shape (n, n_outputs).
+        For the log-modelled outputs the std in log space is the relative error,
+        for power it is the std of the power coefficient.
+        """
+        mean, std = self._predict_transformed(X)
+        return np.column_stack([std[name] for name in OUTPUTS])
+
+    def evaluate(self, X, tol=0.02):
+        """
+        Surrogate predictions, replaced by the truth models wherever the predicted relative
+        error of any output exceeds tol. Returns (values dict, std dict, used_truth mask).
+        """
+        X = np.atleast_2d(X)
+        mean, std = self.predict(X)
+        used_truth = self.relative_error(X).max(axis=1) > tol
+        for i in np.flatnonzero(used_truth):
+            with self.diagnostics:
+                y = truth_models(X[i])
+            self.truth_evaluations += 1
+            for j, name in enumerate(OUTPUTS):
+                mean[name][i] = y[j]
+                std[name][i] = 0.0
+        return mean, std, used_truth
+
+
+# MAIN EXECUTION
+if __name__ == "__main__":
+    surrogate = DesignSurrogate(seed=1)
+    t0 = time.perf_counter()
+    surrogate.train(n_initial=40, n_active=60)
+    print(f"Trained in {time.perf_counter() - t0:.1f} s with {surrogate.truth_evaluations} truth evaluations")
+
+    X_test = surrogate._sample(200)
+    t0 = time.perf_counter()
+    values, std, used_truth = surrogate.evaluate(X_test, tol=0.05)
+    elapsed = time.perf_counter() - t0
+    with surrogate.diagnostics:
+        Y_test = np.array([truth_models(x) for x in X_test])
+    for j, name in enumerate(OUTPUTS):
+        # power error is measured against the power in the wind (i.e. in Cp units)
+        scale = wind_power_MW(X_test) if name == "power_MW" else np.abs(Y_test[:, j])
+        err = np.abs(values[name] - Y_test[:, j]) / scale
+        print(f"{name:<14} median relative error {np.median(err):.2e}, max {err.max():.2e}")
+    print(f"200 evaluations in {elapsed * 1000:.0f} ms, {used_truth.sum()} fell back to the truth models")
+    print(surrogate.diagnostics.summary())
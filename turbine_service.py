@@ -0,0 +1,358 @@
+# === Turbine Design Evaluation Service ===
+"""
+Long-running asyncio HTTP service (stdlib only) for on-demand design evaluations.
+
+Start it from the repository root:
+    python turbine_service.py --port 8050 --workers 4
+
+Endpoints (GET, query-string parameters):
+    /power?D=90&V=6                  expected power (MW)
+    /cost?D=90                       blade cost for the turbine (£, 3 blades)
+    /deflection?D=90&V=22.6[&omega=] tip deflection (m), omega defaults to LAMBDA_OPT*V/R
+    /evaluate?D=90&V=6[&V_max=22.6]  power, cost and worst-case deflection together
+    /metrics                         latency, throughput, batch and cache statistics and the
+                                     counts of the deflection sanity checks
+    /health
+
+Invalid parameters (missing, non-numeric, negative, D above MAX_DIAMETER) give a 400,
+a result that is not finite (inputs beyond what the models can represent) a 422.
+
+The import-time work (scipy/pandas imports and the LAMBDA_OPT solve) is paid once when
+the service starts, and the worker processes are warmed before the first request.
+Requests that arrive together are batched: power requests become one vectorised BEM
+call, deflection requests are split over the process pool as one submission per worker.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from ODE_group.ODE_code import WIND_VELOCITIES, DeflectionDiagnostics, solve_tip_for_DV
+from Power.power_and_cp_root_finding import expected_power_MW_array
+from Final_optimal_diameter import LAMBDA_OPT, blade_cost_gbp
+
+
+# PARAMETERS
+BATCH_WINDOW_S = 0.002      # how long a batch waits for more requests to join
+MAX_BATCH_SIZE = 256
+CACHE_SIZE = 100_000        # entries per result cache
+LATENCY_WINDOW = 2000       # number of recent requests kept for latency percentiles
+MAX_DIAMETER = 300.0        # m, largest rotor accepted (the models are calibrated on 40-130 m)
+
+
+# WORKER FUNCTIONS (run in the process pool)
+def _warm_up():
+    # Forces the worker to import the modules and compile everything once
+    return solve_tip_for_DV(50.0, 10.0, 1.0)
+
+def _power_batch(D, V):
+    return expected_power_MW_array(np.asarray(D), np.asarray(V)).tolist()
+
+def _deflection_batch(D, V, omega):
+    # the sanity checks are counted and returned with the results instead of warning per solve
+    with DeflectionDiagnostics(severity="collect") as diag:
+        values = [solve_tip_for_DV(d, v, w) for d, v, w in zip(D, V, omega)]
+    return values, diag.report()
+
+
+def _all_finite(value):
+    if isinstance(value, dict):
+        return all(_all_finite(v) for v in value.values())
+    if isinstance(value, float):
+        return math.isfinite(value)
+    return True
+
+
+class LRUCache:
+    """Small dict-based LRU cache used for the warm result caches."""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        if key in self.data:
+            self.data.move_to_end(key)
+            self.hits += 1
+            return self.data[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self.data[key] = value
+        self.data.move_to_end(key)
+        if len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+
+class Batcher:
+    """
+    Collects concurrent requests for the same model and evaluates them together.
+    batch_func receives one list per argument and returns a list of results.
+    Identical requests that are already queued or in flight share one evaluation.
+    """
+
+    def __init__(self, name, batch_func, run_batch, cache):
+        self.name = name
+        self.batch_func = batch_func
+        self.run_batch = run_batch          # coroutine (batch_func, columns) -> list of results
+        self.cache = cache
+        self.pending = {}                   # key -> future
+        self.queue = []
+        self.flush_task = None
+        self.n_batches = 0
+        self.n_items = 0
+
+    async def submit(self, key):
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        if key in self.pending:
+            return await self.pending[key]
+
+        fut = asyncio.get_running_loop().create_future()
+        self.pending[key] = fut
+        self.queue.append(key)
+        if len(self.queue) >= MAX_BATCH_SIZE:
+            self._flush_now()
+        elif self.flush_task is None:
+            self.flush_task = asyncio.create_task(self._flush_later())
+        return await fut
+
+    async def _flush_later(self):
+        await asyncio.sleep(BATCH_WINDOW_S)
+        self.flush_task = None
+        self._flush_now()
+
+    def _flush_now(self):
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            self.flush_task = None
+        keys, self.queue = self.queue, []
+        if keys:
+            asyncio.create_task(self._evaluate(keys))
+
+    async def _evaluate(self, keys):
+        self.n_batches += 1
+        self.n_items += len(keys)
+        columns = [list(col) for col in zip(*keys)]
+        try:
+            values = await self.run_batch(self.batch_func, columns)
+        except Exception as exc:
+            for key in keys:
+                fut = self.pending.pop(key)
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        for key, value in zip(keys, values):
+            self.cache.put(key, value)
+            fut = self.pending.pop(key)
+            if not fut.done():
+                fut.set_result(value)
+
+
+class TurbineService:
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.power = Batcher("power", _power_batch, self._run_vectorised, LRUCache())
+        self.deflection = Batcher("deflection", _deflection_batch, self._run_split, LRUCache())
+        self.cost_cache = LRUCache()
+        self.diagnostics = DeflectionDiagnostics(severity="collect")
+        self.started = time.perf_counter()
+        self.latencies = {}
+        self.counts = {}
+        self.errors = 0
+
+    async def warm_up(self):
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self.pool, _warm_up) for _ in range(self.workers)])
+
+    # ways of running a batch
+    async def _run_vectorised(self, func, columns):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, func, *columns)
+
+    async def _run_split(self, func, columns):
+        # one submission per worker, each getting a contiguous slice of the batch;
+        # func returns (values, deflection check report)
+        loop = asyncio.get_running_loop()
+        n = len(columns[0])
+        bounds = np.linspace(0, n, min(self.workers, n) + 1).astype(int)
+        parts = await asyncio.gather(*[
+            loop.run_in_executor(self.pool, func, *[col[lo:hi] for col in columns])
+            for lo, hi in zip(bounds[:-1], bounds[1:])
+        ])
+        for _, report in parts:
+            self.diagnostics.merge(report)
+        return [value for values, _ in parts for value in values]
+
+    # models
+    async def power_MW(self, D, V):
+        return await self.power.submit((D, V))
+
+    async def deflection_m(self, D, V, omega=None):
+        if omega is None:
+            omega = LAMBDA_OPT * V / (D / 2.0)
+        return await self.deflection.submit((D, V, omega))
+
+    def cost_gbp(self, D):
+        cost = self.cost_cache.get(D)
+        if cost is None:
+            cost = float(blade_cost_gbp(D))
+            self.cost_cache.put(D, cost)
+        return cost
+
+    async def evaluate(self, D, V, V_max):
+        power, deflection = await asyncio.gather(self.power_MW(D, V), self.deflection_m(D, V_max))
+        return {"D": D, "V": V, "V_max": V_max, "power_MW": power,
+                "cost_GBP": self.cost_gbp(D), "tip_deflection_m": deflection}
+
+    def metrics(self):
+        uptime = time.perf_counter() - self.started
+        endpoints = {}
+        for path, lat in self.latencies.items():
+            arr = np.array(lat) * 1000.0
+            endpoints[path] = {
+                "count": self.counts[path],
+                "p50_ms": float(np.percentile(arr, 50)),
+                "p95_ms": float(np.percentile(arr, 95)),
+                "max_ms": float(arr.max()),
+            }
+        total = sum(self.counts.values())
+        return {
+            "uptime_s": uptime,
+            "requests": total,
+            "errors": self.errors,
+            "throughput_req_per_s": total / uptime if uptime > 0 else 0.0,
+            "endpoints": endpoints,
+            "batches": {
+                b.name: {"batches": b.n_batches, "items": b.n_items,
+                         "mean_batch_size": b.n_items / b.n_batches if b.n_batches else 0.0}
+                for b in (self.power, self.deflection)
+            },
+            "caches": {
+                name: {"size": len(c.data), "hits": c.hits, "misses": c.misses}
+                for name, c in (("power", self.power.cache), ("deflection", self.deflection.cache),
+                                ("cost", self.cost_cache))
+            },
+            "deflection_checks": self.diagnostics.report(),
+            "workers": self.workers,
+        }
+
+    # HTTP handling
+    async def route(self, path, query):
+        def number(name, default=None, positive=False, maximum=None):
+            if name not in query:
+                if default is None:
+                    raise ValueError(f"missing parameter '{name}'")
+                return default
+            try:
+                value = float(query[name][0])
+            except ValueError:
+                raise ValueError(f"parameter '{name}' must be a number") from None
+            if not np.isfinite(value):
+                raise ValueError(f"parameter '{name}' must be finite")
+            if value < 0 or (positive and value == 0):
+                raise ValueError(f"parameter '{name}' must be {'positive' if positive else 'non-negative'}")
+            if maximum is not None and value > maximum:
+                raise ValueError(f"parameter '{name}' must be at most {maximum:g}")
+            return value
+
+        def diameter():
+            return number("D", positive=True, maximum=MAX_DIAMETER)
+
+        if path == "/health":
+            return {"status": "ok", "lambda_opt": LAMBDA_OPT}
+        if path == "/metrics":
+            return self.metrics()
+        if path == "/power":
+            D, V = diameter(), number("V")
+            return {"D": D, "V": V, "power_MW": await self.power_MW(D, V)}
+        if path == "/cost":
+            D = diameter()
+            return {"D": D, "cost_GBP": self.cost_gbp(D)}
+        if path == "/deflection":
+            D, V = diameter(), number("V")
+            omega = number("omega") if "omega" in query else None
+            return {"D": D, "V": V, "tip_deflection_m": await self.deflection_m(D, V, omega)}
+        if path == "/evaluate":
+            D, V = diameter(), number("V")
+            return await self.evaluate(D, V, number("V_max", max(WIND_VELOCITIES.values())))
+        return None
+
+    async def handle(self, reader, writer):
+        t0 = time.perf_counter()
+        status, body, path = 200, {}, None
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass                                    # headers are not needed
+            if len(request_line) < 2 or request_line[0] != "GET":
+                status, body = 405, {"error": "only GET is supported"}
+            else:
+                url = urlsplit(request_line[1])
+                path = url.path
+                body = await self.route(path, parse_qs(url.query))
+                if body is None:
+                    status, body = 404, {"error": f"unknown endpoint {path}"}
+                elif not _all_finite(body):
+                    status, body = 422, {"error": "inputs outside the range of the models (non-finite result)"}
+        except ValueError as exc:
+            status, body = 400, {"error": str(exc)}
+        except Exception as exc:
+            status, body = 500, {"error": f"{type(exc).__name__}: {exc}"}
+
+        if status != 200:
+            self.errors += 1
+        elif path != "/metrics":
+            self.counts[path] = self.counts.get(path, 0) + 1
+            self.latencies.setdefault(path, deque(maxlen=LATENCY_WINDOW)).append(time.perf_counter() - t0)
+
+        payload = json.dumps(body, allow_nan=False).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+            "Connection: close\r\n\r\n".encode() + payload
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+async def serve(host="127.0.0.1", port=8050, workers=None):
+    service = TurbineService(workers)
+    await service.warm_up()
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"Turbine service listening on http://{host}:{port} ({service.workers} workers, "
+          f"lambda_opt={LAMBDA_OPT:.4f})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.pool.shutdown()
+
+
+# MAIN EXECUTION
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local HTTP service for turbine design evaluations.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass